@@ -0,0 +1,9 @@
+from fastapi import Response
+from pydantic_core import to_json
+
+def trusted_json_response(content, status_code: int = 200) -> Response:
+    """
+    JSON response for data the app built itself: serialized by pydantic-core in one pass, skipping the
+    response_model validation FastAPI would run again (the route's response_model still documents the schema).
+    """
+    return Response(content=to_json(content), status_code=status_code, media_type="application/json")
@@ -1,29 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, timedelta, timezone
 from argon2 import PasswordHasher
-from pymongo import MongoClient
+from argon2.exceptions import VerificationError, InvalidHashError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import math
 import os
+import uuid
 import jwt
 
+from api import trusted_json_response
+from api.cache import user_cache
+from api.ratelimit import limit_by_ip, limit_by_username
+from database import get_db
+from database.indexes import duplicate_key_field
+from utils.metrics import register_gauges, timed, timed_call
+
 # -----------------------------------------------------------------------------
 # Config
 # -----------------------------------------------------------------------------
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(limit_by_ip)])
 
-MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-DB_NAME = os.getenv("MONGODB_DB", "resume_assist")
 USERS_COLL = "users"
+REVOCATIONS_COLL = "revocations"
+
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = os.getenv("JWT_SECRET", "temp-secret-i-will-change-one-day")
 ALGORITHM = os.getenv("JWT_ALG", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_MIN", "15"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_DAYS", "7"))
-
-mongo_client = MongoClient(MONGO_URI)
-db = mongo_client[DB_NAME]
+REFRESH_MAX_SESSIONS = int(os.getenv("REFRESH_MAX_SESSIONS", "10"))
+
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "30"))
+REVOCATION_MAX_BACKOFF_SECONDS = float(os.getenv("REVOCATION_MAX_BACKOFF_SECONDS", "60"))
+REVOCATION_CLOCK_SKEW_SECONDS = float(os.getenv("REVOCATION_CLOCK_SKEW_SECONDS", "5"))
+
+REGISTER_CONFLICTS = {
+    "username": "Username already exists",
+    "email": "Email already registered",
+    "phone_number": "Phone number already registered",
+}
+UPDATE_CONFLICTS = {"email": "Email already in use", "phone_number": "Phone number already in use"}
 
 # -----------------------------------------------------------------------------
 # Pydantic Schemas
@@ -45,6 +75,9 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     expires_in: int
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class UserPublic(BaseModel):
     id: str
     username: str
@@ -62,12 +95,38 @@ class UpdateAccountRequest(BaseModel):
 # Utils
 # -----------------------------------------------------------------------------\
 
-ph = PasswordHasher()
-def hash_password(password: str) -> str: return ph.hash(password)
+ph = PasswordHasher(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=ARGON2_PARALLELISM)
+
+# Argon2 is deliberately slow, so it runs on a bounded pool instead of the event loop.
+# Once HASH_WORKERS are busy and HASH_QUEUE_LIMIT calls are waiting, new calls fail fast with a 503.
+hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="argon2")
+_hash_stats = {"pending": 0, "completed": 0, "rejected": 0}
+
+async def _run_hasher(fn, *args):
+    if _hash_stats["pending"] >= HASH_WORKERS + HASH_QUEUE_LIMIT:
+        _hash_stats["rejected"] += 1
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server busy, try again shortly", headers={"Retry-After": "1"})
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    try:  ph.verify(hashed_password, plain_password)
-    except Exception: return False
+    _hash_stats["pending"] += 1
+    try: return await asyncio.get_running_loop().run_in_executor(hash_executor, timed_call("argon2", fn.__name__, fn), *args)
+    finally:
+        _hash_stats["pending"] -= 1
+        _hash_stats["completed"] += 1
+
+async def hash_password(password: str) -> str: return await _run_hasher(ph.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try: return await _run_hasher(ph.verify, hashed_password, plain_password)
+    except (VerificationError, InvalidHashError): return False
+
+def hasher_stats() -> dict:
+    """Argon2 parameters and pool counters, for the metrics endpoint."""
+    return {
+        "time_cost": ARGON2_TIME_COST, "memory_cost": ARGON2_MEMORY_COST, "parallelism": ARGON2_PARALLELISM,
+        "workers": HASH_WORKERS, "queue_limit": HASH_QUEUE_LIMIT, **_hash_stats,
+    }
+
+register_gauges("argon2", hasher_stats)
 
 def _now_utc() -> datetime: return datetime.now(timezone.utc)
 
@@ -76,37 +135,181 @@ def create_access_token(*, user_id: str, username: str, token_version: int) -> s
     payload = {
         "sub": user_id, "usr": username, "ver": token_version, "type": "access", "exp": expire, "iat": _now_utc(),
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    with timed("jwt", "encode"): return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def create_refresh_token(*, user_id: str, username: str, token_version: int) -> str:
+def create_refresh_token(*, user_id: str, username: str, token_version: int, family: str, jti: str) -> str:
     expire = _now_utc() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     payload = {
         "sub": user_id, "usr": username, "ver": token_version, "type": "refresh", "exp": expire, "iat": _now_utc(),
+        "fam": family, "jti": jti,
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    with timed("jwt", "encode"): return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
 def decode_token(token: str) -> dict:
-    try: return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    try:
+        with timed("jwt", "decode"): return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.ExpiredSignatureError: raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
     except jwt.InvalidTokenError: raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 
+def _public_fields(user: dict) -> dict:
+    return {
+        "id": str(user.get("_id")),
+        "username": user.get("username"),
+        "name": user.get("name"),
+        "email": user.get("email"),
+        "phone_number": user.get("phone_number"),
+        "created_at": user.get("created_at"),
+    }
+
+# User docs come from our own DB (or were validated on the way in), so skip re-running field validation such as EmailStr
+_construct = getattr(UserPublic, "model_construct", None) or UserPublic.construct
+
 def user_doc_to_public(user: dict) -> UserPublic:
-    return UserPublic(
-        id=str(user.get("_id")),
-        username=user.get("username"),
-        name=user.get("name"),
-        email=user.get("email"),
-        phone_number=user.get("phone_number"),
-        created_at=user.get("created_at")
+    return _construct(**_public_fields(user))
+
+def user_public_response(user: dict, status_code: int = 200) -> Response:
+    """Serialize a trusted user doc straight to JSON, bypassing response_model validation (the schema stays in the docs)."""
+    return trusted_json_response(_public_fields(user), status_code=status_code)
+
+def _refresh_session(jti: str, now: datetime) -> dict:
+    return {"jti": jti, "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)}
+
+def _stale_families(sessions: dict, now: datetime) -> List[str]:
+    """
+    Refresh families to drop when a new one is added: expired ones, then the oldest live ones beyond
+    REFRESH_MAX_SESSIONS - 1, so a user document never holds more than REFRESH_MAX_SESSIONS families.
+    """
+    live, stale = [], []
+    for family, session in sessions.items():
+        expires_at = session.get("expires_at") if isinstance(session, dict) else None
+        # Mongo hands datetimes back naive, in UTC
+        if expires_at is not None and expires_at.tzinfo is None: expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at is None or expires_at <= now: stale.append(family)
+        else: live.append((expires_at, family))
+    live.sort()
+    return stale + [family for _, family in live[:max(0, len(live) - (REFRESH_MAX_SESSIONS - 1))]]
+
+def _issue_tokens(user: dict, family: str, jti: str) -> TokenResponse:
+    access_token = create_access_token(
+        user_id=str(user["_id"]),
+        username=user["username"],
+        token_version=user.get("token_version", 1)
+    )
+    refresh_token = create_refresh_token(
+        user_id=str(user["_id"]),
+        username=user["username"],
+        token_version=user.get("token_version", 1),
+        family=family,
+        jti=jti
+    )
+
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
     )
 
+# -----------------------------------------------------------------------------
+# Revocation Index
+# -----------------------------------------------------------------------------
+class RevocationIndex:
+    """
+    In-memory map of user id -> minimum valid token_version.
+
+    Loaded from the users collection at startup and kept current from a change stream that resumes at the
+    load's operation time, so nothing between the load and the watch is missed. Standalone mongod has no
+    change streams; there the index polls the revocations log every REVOCATION_REFRESH_SECONDS for entries
+    written since the last poll, which then bounds how long a revoked token stays usable on other workers.
+
+    Any sync error is logged and followed by a full reload and a restart, backing off up to
+    REVOCATION_MAX_BACKOFF_SECONDS while the errors continue.
+    """
+
+    def __init__(self, refresh_interval: float, max_backoff: float = REVOCATION_MAX_BACKOFF_SECONDS):
+        self.refresh_interval = refresh_interval
+        self.max_backoff = max_backoff
+        self._min_version: dict = {}
+        self._start_at = None
+        self._polled_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, user_id: str) -> Optional[float]: return self._min_version.get(user_id)
+    def set(self, user_id: str, token_version: int): self._min_version[user_id] = token_version
+    def revoke_all(self, user_id: str): self._min_version[user_id] = math.inf
+
+    def _raise_to(self, user_id: str, token_version: float):
+        # Poll windows overlap and change events can be replayed after a resync, so versions only ever go up
+        self._min_version[user_id] = max(self._min_version.get(user_id, 0), token_version)
+
+    async def load(self, users):
+        # operationTime is only reported by replica sets, which is also where change streams are available
+        reply = await users.database.command("ping")
+        polled_at = _now_utc()
+        versions = {}
+        async for doc in users.find({}, {"token_version": 1}):
+            versions[str(doc["_id"])] = doc.get("token_version", 0)
+        self._min_version = versions
+        self._start_at = reply.get("operationTime")
+        self._polled_at = polled_at
+
+    async def _follow(self, users):
+        pipeline = [{"$project": {"operationType": 1, "documentKey": 1, "fullDocument.token_version": 1}}]
+        async with users.watch(pipeline, full_document="updateLookup", start_at_operation_time=self._start_at) as stream:
+            async for change in stream:
+                # drop/rename/invalidate carry no documentKey and close the stream, the caller then resyncs
+                key = change.get("documentKey")
+                if key is None: continue
+                user_id, doc = str(key["_id"]), change.get("fullDocument")
+                if change["operationType"] == "delete" or doc is None: self.revoke_all(user_id)
+                else: self._raise_to(user_id, doc.get("token_version", 0))
+
+    async def _poll(self, revocations):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            polled_at = _now_utc()
+            since = self._polled_at - timedelta(seconds=REVOCATION_CLOCK_SKEW_SECONDS)
+            async for entry in revocations.find({"created_at": {"$gte": since}}, {"user_id": 1, "token_version": 1}):
+                version = entry.get("token_version")
+                self._raise_to(entry["user_id"], math.inf if version is None else version)
+            self._polled_at = polled_at
+
+    async def _sync(self, users, revocations):
+        delay = initial_delay = min(1.0, self.max_backoff)
+        while True:
+            try:
+                if self._start_at is None: await self._poll(revocations)
+                else: await self._follow(users)
+            except asyncio.CancelledError: raise
+            except Exception:
+                logger.exception("Revocation index sync failed, resyncing in %.0fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+            else: delay = initial_delay
+
+            try: await self.load(users)
+            except asyncio.CancelledError: raise
+            except Exception: logger.exception("Revocation index reload failed, keeping the previous state")
+
+    async def start(self, users, revocations):
+        await self.load(users)
+        self._task = asyncio.create_task(self._sync(users, revocations))
+
+    async def stop(self):
+        if self._task: self._task.cancel()
+
+revocation_index = RevocationIndex(REVOCATION_REFRESH_SECONDS)
+
+async def record_revocation(db: AsyncIOMotorDatabase, user_id: str, token_version: Optional[int]):
+    """Log a revocation (None meaning the account is gone) for workers that poll instead of watching."""
+    await db[REVOCATIONS_COLL].insert_one({"user_id": user_id, "token_version": token_version, "created_at": _now_utc()})
+
 # -----------------------------------------------------------------------------
 # Dependencies
 # -----------------------------------------------------------------------------
-async def get_current_user(request: Request) -> dict:
+def _access_token_payload(request: Request) -> dict:
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
@@ -116,90 +319,148 @@ async def get_current_user(request: Request) -> dict:
 
     if payload.get("type") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not an access token")
+    return payload
 
+async def get_current_principal(request: Request, db: AsyncIOMotorDatabase = Depends(get_db)) -> dict:
+    """
+    Claims-only principal: the validated token payload, checked against the revocation index.
+
+    Use this for routes that only need `sub`/`usr`; it does not touch Mongo unless the user is not indexed yet.
+    """
+    payload = _access_token_payload(request)
     user_id = payload.get("sub")
-    token_version = payload.get("ver", 0)
 
-    user = db[USERS_COLL].find_one({"_id": ObjectId(user_id)})
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    min_version = revocation_index.get(user_id)
+    if min_version is None:
+        user = await db[USERS_COLL].find_one({"_id": ObjectId(user_id)}, {"token_version": 1})
+        if not user:
+            revocation_index.revoke_all(user_id)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        # A revocation may have raised the index while we were reading, and that must win
+        revocation_index._raise_to(user_id, user.get("token_version", 0))
+        min_version = revocation_index.get(user_id)
+
+    if payload.get("ver", 0) < min_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+    return payload
+
+async def get_current_user(request: Request, db: AsyncIOMotorDatabase = Depends(get_db)) -> dict:
+    payload = _access_token_payload(request)
+    user_id = payload.get("sub")
+    token_version = payload.get("ver", 0)
 
-    if user.get("token_version", 0) != token_version:
+    # A cached doc with a different token_version may be stale (e.g. bumped by another worker), so re-read it once.
+    user = user_cache.get(user_id)
+    if user is None or user.get("token_version", 0) != token_version:
+        user = await db[USERS_COLL].find_one({"_id": ObjectId(user_id)})
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user_cache.set(user_id, user)
+        revocation_index._raise_to(user_id, user.get("token_version", 0))
+
+    # Revocations from other workers reach the index but not this worker's cache, so check it on hits too
+    if user.get("token_version", 0) != token_version or token_version < (revocation_index.get(user_id) or 0):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
 
-    return user
+    return dict(user)
 
 # -----------------------------------------------------------------------------
 # Routes
 # -----------------------------------------------------------------------------
-@router.post("/register", response_model=UserPublic, status_code=201)
-async def register(payload: RegisterRequest):
-    existing = db[USERS_COLL].find_one({"$or": [{"username": payload.username}, {"email": payload.email}, {"phone_number": payload.phone_number}]})
-    if existing:
-        if existing.get("username") == payload.username:
-            raise HTTPException(status_code=409, detail="Username already exists")
-        if existing.get("email") == payload.email:
-            raise HTTPException(status_code=409, detail="Email already registered")
-        if existing.get("phone_number") == payload.phone_number:
-            raise HTTPException(status_code=409, detail="Phone number already registered")
-
+@router.post("/register", response_model=UserPublic, status_code=201, dependencies=[Depends(limit_by_username)])
+async def register(payload: RegisterRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
     doc = {
         "username": payload.username,
-        "password_hash": hash_password(payload.password),
+        "password_hash": await hash_password(payload.password),
         "name": payload.name,
         "email": payload.email,
         "phone_number": payload.phone_number,
         "created_at": _now_utc(),
         "token_version": 1
     }
-    res = db[USERS_COLL].insert_one(doc)
+    # Uniqueness is enforced by the indexes from database.indexes, no racy pre-check needed
+    try: res = await db[USERS_COLL].insert_one(doc)
+    except DuplicateKeyError as err:
+        raise HTTPException(status_code=409, detail=REGISTER_CONFLICTS.get(duplicate_key_field(err), "Account already exists"))
     doc["_id"] = res.inserted_id
-    return user_doc_to_public(doc)
+    revocation_index.set(str(res.inserted_id), doc["token_version"])
+    return user_public_response(doc, status_code=201)
 
 @router.put("/update", response_model=UserPublic)
-async def update_account(payload: UpdateAccountRequest, user: dict = Depends(get_current_user)):
-    updates = {k: v for k, v in payload.dict().items() if v is not None}
+async def update_account(payload: UpdateAccountRequest, user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    updates = {k: v for k, v in payload.model_dump().items() if v is not None}
     if not updates: raise HTTPException(status_code=400, detail="No valid fields to update")
 
-    if "email" in updates:
-        existing = db[USERS_COLL].find_one({"email": updates["email"], "_id": {"$ne": user["_id"]}})
-        if existing: raise HTTPException(status_code=409, detail="Email already in use")
-
-    if "phone_number" in updates:
-        existing = db[USERS_COLL].find_one({"phone_number": updates["phone_number"], "_id": {"$ne": user["_id"]}})
-        if existing: raise HTTPException(status_code=409, detail="Phone number already in use")
+    try: user = await db[USERS_COLL].find_one_and_update({"_id": user["_id"]}, {"$set": updates}, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError as err:
+        raise HTTPException(status_code=409, detail=UPDATE_CONFLICTS.get(duplicate_key_field(err), "Account details already in use"))
+    if not user: raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    db[USERS_COLL].update_one({"_id": user["_id"]}, {"$set": updates})
-    user.update(updates)
-    return user_doc_to_public(user)
+    # Other workers drop their copy, this one keeps the fresh document for the user's next request
+    await user_cache.invalidate(str(user["_id"]))
+    user_cache.set(str(user["_id"]), user)
+    return user_public_response(user)
 
 @router.delete("/delete")
-async def delete_account(user: dict = Depends(get_current_user)):
-    db[USERS_COLL].delete_one({"_id": user["_id"]})
+async def delete_account(user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    await db[USERS_COLL].delete_one({"_id": user["_id"]})
+    await user_cache.invalidate(str(user["_id"]))
+    revocation_index.revoke_all(str(user["_id"]))
+    await record_revocation(db, str(user["_id"]), None)
     return {"message": "Account deleted successfully"}
 
-@router.post("/login", response_model=TokenResponse)
-async def login(payload: LoginRequest):
-    user = db[USERS_COLL].find_one({"username": payload.username})
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(limit_by_username)])
+async def login(payload: LoginRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
+    user = await db[USERS_COLL].find_one({"username": payload.username})
     if not user: raise HTTPException(status_code=401, detail="Invalid username or password")
 
-    try: ph.verify(user["password_hash"], payload.password)
-    except Exception: raise HTTPException(status_code=401, detail="Invalid username or password")
-
-    # Generate tokens
-    access_token = create_access_token(
-        user_id=str(user["_id"]),
-        username=user["username"],
-        token_version=user.get("token_version", 1)
+    if not await verify_password(payload.password, user["password_hash"]):
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    # Each login starts a new refresh token family; only the latest jti of a family is accepted by /refresh.
+    # Expired and surplus families are dropped in the same write, so the user document stays bounded.
+    now, family, jti = _now_utc(), uuid.uuid4().hex, uuid.uuid4().hex
+    update = {"$set": {f"refresh_sessions.{family}": _refresh_session(jti, now)}}
+    stale = _stale_families(user.get("refresh_sessions") or {}, now)
+    if stale: update["$unset"] = {f"refresh_sessions.{stale_family}": "" for stale_family in stale}
+    await db[USERS_COLL].update_one({"_id": user["_id"]}, update)
+    return _issue_tokens(user, family, jti)
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(payload: RefreshRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
+    claims = decode_token(payload.refresh_token)
+    if claims.get("type") != "refresh" or not claims.get("fam") or not claims.get("jti"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not a refresh token")
+
+    user_id, family = ObjectId(claims["sub"]), claims["fam"]
+    session_key = f"refresh_sessions.{family}"
+    new_jti = uuid.uuid4().hex
+
+    # Rotate in a single round-trip: only matches if this jti is still the current one for its family
+    user = await db[USERS_COLL].find_one_and_update(
+        {"_id": user_id, "token_version": claims.get("ver", 0), f"{session_key}.jti": claims["jti"]},
+        {"$set": {session_key: _refresh_session(new_jti, _now_utc())}},
+        projection={"username": 1, "token_version": 1},
+        return_document=ReturnDocument.AFTER,
     )
-    refresh_token = create_refresh_token(
-        user_id=str(user["_id"]),
-        username=user["username"],
-        token_version=user.get("token_version", 1)
+    if not user:
+        # Either revoked or an already-rotated token being replayed; kill the family so neither copy works again
+        await db[USERS_COLL].update_one({"_id": user_id}, {"$unset": {session_key: ""}})
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+    return _issue_tokens(user, family, new_jti)
+
+@router.post("/logout-all")
+async def logout_all(principal: dict = Depends(get_current_principal), db: AsyncIOMotorDatabase = Depends(get_db)):
+    user = await db[USERS_COLL].find_one_and_update(
+        {"_id": ObjectId(principal["sub"])},
+        {"$inc": {"token_version": 1}, "$unset": {"refresh_sessions": ""}},
+        projection={"token_version": 1},
+        return_document=ReturnDocument.AFTER,
     )
+    if not user: raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    return TokenResponse(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
-    )
+    revocation_index._raise_to(principal["sub"], user["token_version"])
+    await user_cache.invalidate(principal["sub"])
+    await record_revocation(db, principal["sub"], user["token_version"])
+    return {"message": "Logged out from all sessions"}
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import asyncio
+import os
+import time
+
+from utils.metrics import register_gauges
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "1") == "1"
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_REDIS_URL = os.getenv("USER_CACHE_REDIS_URL")
+
+# -----------------------------------------------------------------------------
+# Invalidation Backends
+# -----------------------------------------------------------------------------
+class LocalInvalidationBackend:
+    """Single-process backend: invalidations only apply to the local cache."""
+
+    async def start(self, on_invalidate: Callable[[str], None]): pass
+    async def stop(self): pass
+    async def publish(self, key: str): pass
+
+
+class RedisInvalidationBackend:
+    """Broadcasts invalidations over Redis pub/sub so every uvicorn worker drops the same keys."""
+
+    def __init__(self, url: str, channel: str = "resume-assist:user-cache"):
+        import redis.asyncio as redis  # Optional dependency, only needed for multi-worker deployments
+        self.channel = channel
+        self._redis = redis.from_url(url)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, on_invalidate: Callable[[str], None]):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(pubsub, on_invalidate))
+
+    async def _listen(self, pubsub, on_invalidate: Callable[[str], None]):
+        async for message in pubsub.listen():
+            if message.get("type") == "message":
+                data = message["data"]
+                on_invalidate(data.decode() if isinstance(data, bytes) else data)
+
+    async def stop(self):
+        if self._task: self._task.cancel()
+        await self._redis.close()
+
+    async def publish(self, key: str):
+        await self._redis.publish(self.channel, key)
+
+# -----------------------------------------------------------------------------
+# TTL + LRU Cache
+# -----------------------------------------------------------------------------
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, max_size: int, ttl: float, backend=None, enabled: bool = True):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self.backend = backend or LocalInvalidationBackend()
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled: return None
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None: del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any):
+        if not self.enabled: return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: str):
+        self._data.pop(key, None)
+
+    async def invalidate(self, key: str):
+        """Drop `key` locally and tell the other workers to drop it too."""
+        self.discard(key)
+        await self.backend.publish(key)
+
+    async def start(self): await self.backend.start(self.discard)
+    async def stop(self): await self.backend.stop()
+
+    def clear(self): self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "max_size": self.max_size, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+user_cache = TTLCache(
+    max_size=USER_CACHE_SIZE,
+    ttl=USER_CACHE_TTL,
+    backend=RedisInvalidationBackend(USER_CACHE_REDIS_URL) if USER_CACHE_REDIS_URL else None,
+    enabled=USER_CACHE_ENABLED,
+)
+register_gauges("user_cache", user_cache.stats)
@@ -0,0 +1,80 @@
+from starlette.datastructures import Headers, MutableHeaders
+from typing import Dict
+import gzip
+import os
+
+try: import brotli  # Optional, gzip is always available
+except ImportError: brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+def _accepted_qualities(accept_encoding: str) -> Dict[str, float]:
+    qualities = {}
+    for part in accept_encoding.lower().split(","):
+        name, *params = [item.strip() for item in part.split(";")]
+        if not name: continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() != "q": continue
+            # An unreadable q-value is treated as a refusal rather than guessed at
+            try: quality = float(value)
+            except ValueError: quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+def negotiate(accept_encoding: str) -> str:
+    """Pick br, gzip or identity for an Accept-Encoding header. q=0 refuses an encoding; ties prefer brotli."""
+    qualities = _accepted_qualities(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda name: qualities.get(name, wildcard))
+    return best if qualities.get(best, wildcard) > 0 else "identity"
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression for single-body responses of at least `minimum_size` bytes.
+
+    Streaming responses, and responses that already set Content-Encoding (like the precompressed
+    /custom-docs page), are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "identity":
+            return await self.app(scope, receive, send)
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                return await send(message)
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if "content-encoding" in headers or message.get("more_body") or len(body) < self.minimum_size:
+                await send(start_message)
+                start_message = None
+                return await send(message)
+
+            body = brotli.compress(body, quality=BROTLI_QUALITY) if encoding == "br" else gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            start_message = None
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
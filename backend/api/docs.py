@@ -1,13 +1,52 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Response
 from fastapi.responses import HTMLResponse
 from fastapi.routing import APIRoute
+import gzip
+import hashlib
 import json
 
+from api.compression import brotli, negotiate
+
 router = APIRouter()
 
+# The page only depends on the route table, so it is rendered once and re-rendered only if routes change
+_page_cache = {"key": None}
+
+def _routes_key(app) -> tuple:
+    return tuple(id(route) for route in app.routes)
+
+def _get_page(app) -> dict:
+    key = _routes_key(app)
+    if _page_cache["key"] != key:
+        body = render_docs_page(app).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None: variants["br"] = brotli.compress(body, quality=11)
+        _page_cache.update(
+            key=key,
+            variants=variants,
+            etags={encoding: f'"{digest}-{encoding}"' for encoding in variants},
+        )
+    return _page_cache
+
+def _etag_matches(if_none_match: str, etags: dict) -> bool:
+    # If-None-Match uses weak comparison, and every variant carries the same content
+    candidates = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or any(etag in candidates for etag in etags.values())
+
 @router.get("/", response_class=HTMLResponse)
 async def custom_docs(request: Request):
-    app = request.app
+    page = _get_page(request.app)
+    encoding = negotiate(request.headers.get("accept-encoding", ""))
+    headers = {"ETag": page["etags"][encoding], "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match", ""), page["etags"]):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity": headers["Content-Encoding"] = encoding
+    return Response(content=page["variants"][encoding], media_type="text/html; charset=utf-8", headers=headers)
+
+def render_docs_page(app) -> str:
     routes = [route for route in app.routes if isinstance(route, APIRoute)]
 
     # Group routes by tags
@@ -18,7 +57,7 @@ async def custom_docs(request: Request):
             grouped_routes[tag] = []
         grouped_routes[tag].append(route)
 
-    html = """
+    parts = ["""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -113,11 +152,11 @@ async def custom_docs(request: Request):
         <header>
             <h1>Resume Assist API Documentation</h1>
         </header>
-    """
+    """]
 
     # Grouped endpoints
     for tag, tag_routes in grouped_routes.items():
-        html += f"<div class='container'><h2>{tag} Endpoints</h2>"
+        parts.append(f"<div class='container'><h2>{tag} Endpoints</h2>")
         for idx, route in enumerate(tag_routes):
             methods = ", ".join(route.methods)
             route_id = f"details_{tag}_{idx}"
@@ -129,20 +168,20 @@ async def custom_docs(request: Request):
             }
             details_json = json.dumps(details, indent=4)
 
-            html += f"""
+            parts.append(f"""
             <div class="endpoint" onclick="toggleDetails('{route_id}')">
                 <b>{methods}</b> - {route.path}
                 <div id="{route_id}" class="endpoint-details"><pre>{details_json}</pre></div>
             </div>
-            """
-        html += "</div>"
+            """)
+        parts.append("</div>")
 
-    html += """
+    parts.append("""
         <footer>
             <p>&copy; 2025 Resume Assist API | Built with <a href="https://fastapi.tiangolo.com/">FastAPI</a></p>
         </footer>
     </body>
     </html>
-    """
+    """)
 
-    return HTMLResponse(content=html)
+    return "".join(parts)
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import threading
+
+from api import trusted_json_response
+from api.auth import get_current_principal
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+router = APIRouter()
+
+GRADING_WORKERS = int(os.getenv("GRADING_WORKERS", "2"))
+
+# NumPy releases the GIL inside the matrix work, so a thread pool keeps grading off the event loop
+grading_executor = ThreadPoolExecutor(max_workers=GRADING_WORKERS, thread_name_prefix="grading")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Lazily build the shared ChromaDB-backed grading engine (runs inside the worker pool)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from database.chroma import ChromaDB
+            from utils.grading import GradingEngine
+            _engine = GradingEngine(ChromaDB())
+    return _engine
+
+# -----------------------------------------------------------------------------
+# Pydantic Schemas
+# -----------------------------------------------------------------------------
+class GradeRequest(BaseModel):
+    job_descriptions: List[str] = Field(..., min_length=1)
+    resumes: Optional[List[str]] = None
+    top_k: int = Field(10, ge=1, le=1000)
+
+class ResumeScore(BaseModel):
+    resume: str
+    score: float
+    sections: Dict[str, float]
+
+class GradeResponse(BaseModel):
+    results: List[List[ResumeScore]]
+
+# -----------------------------------------------------------------------------
+# Routes
+# -----------------------------------------------------------------------------
+def _grade(payload: GradeRequest):
+    return get_engine().grade(payload.job_descriptions, resumes=payload.resumes, top_k=payload.top_k)
+
+@router.post("/score", response_model=GradeResponse)
+async def score_resumes(payload: GradeRequest, principal: dict = Depends(get_current_principal)):
+    results = await asyncio.get_running_loop().run_in_executor(grading_executor, _grade, payload)
+    # Engine output is already plain floats and strings; validating thousands of scores again buys nothing
+    return trusted_json_response({"results": results})
@@ -0,0 +1,248 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import multiprocessing
+import os
+import uuid
+
+from api.auth import get_current_principal
+from database import Database
+from utils.jobs import JOB_HANDLERS, JOB_LOCKS, JOB_LOCKS_COLL, JOBS_COLL, run_job, validate_job_params
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+router = APIRouter()
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_MAX_ACTIVE_PER_USER = int(os.getenv("JOB_MAX_ACTIVE_PER_USER", "5"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+
+# -----------------------------------------------------------------------------
+# Pydantic Schemas
+# -----------------------------------------------------------------------------
+class JobRequest(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+class JobPublic(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+def _now_utc() -> datetime: return datetime.now(timezone.utc)
+
+def job_doc_to_public(job: dict) -> JobPublic:
+    return JobPublic(
+        id=str(job["_id"]),
+        kind=job["kind"],
+        status=job["status"],
+        attempts=job.get("attempts", 0),
+        progress=job.get("progress"),
+        result=job.get("result"),
+        error=job.get("error"),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"]
+    )
+
+# -----------------------------------------------------------------------------
+# Dispatcher
+# -----------------------------------------------------------------------------
+class JobDispatcher:
+    """
+    Pulls jobs from the Mongo-backed queue and runs them on a process pool, at most `workers` at a time.
+
+    Jobs are claimed atomically, so several uvicorn workers can share one queue. A claimed job holds a lease
+    that is renewed while it runs; if its dispatcher dies, the lease expires and another one picks it up.
+    Failed jobs are retried with exponential backoff until JOB_MAX_ATTEMPTS is reached.
+
+    Kinds listed in JOB_LOCKS also need their lock, a leased document in JOB_LOCKS_COLL shared by every
+    dispatcher, so e.g. only one ingestion writes to the Chroma store at a time. They are claimed first so
+    a steady stream of other jobs cannot starve them.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.id = uuid.uuid4().hex
+        self._running: Dict[ObjectId, asyncio.Task] = {}
+        self._locks: Dict[ObjectId, str] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.jobs: Optional[Database] = None
+        self.locks: Optional[Database] = None
+
+    def notify(self):
+        """Wake the dispatcher right away instead of at the next poll, e.g. after a job is enqueued."""
+        if self._wakeup is not None: self._wakeup.set()
+
+    async def start(self):
+        self.jobs = Database(JOBS_COLL)
+        self.locks = Database(JOB_LOCKS_COLL)
+        self._wakeup = asyncio.Event()
+        self.executor = self._new_executor()
+        self._tasks = [asyncio.create_task(self._dispatch()), asyncio.create_task(self._heartbeat())]
+
+    async def stop(self):
+        for task in self._tasks: task.cancel()
+        for task in self._running.values(): task.cancel()
+        if self.executor: self.executor.shutdown(wait=False)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Spawned, not forked: workers start on first submit, and a fork by then would copy the Chroma client's
+        # locks and dead helper threads (embedding batcher, write-behind flusher) into the child, where they hang
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _claimable(self, kinds: dict) -> dict:
+        now = _now_utc()
+        return {"kind": kinds, "$or": [
+            {"status": "queued", "run_after": {"$lte": now}},
+            # A job whose dispatcher died counts as an attempt, so one that keeps crashing its worker stops retrying
+            {"status": "running", "lease_until": {"$lt": now}, "attempts": {"$lt": JOB_MAX_ATTEMPTS}},
+        ]}
+
+    async def _claim_one(self, kinds: dict) -> Optional[dict]:
+        now = _now_utc()
+        return await self.jobs.find_one_and_update(
+            self._claimable(kinds),
+            {"$set": {"status": "running", "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS), "updated_at": now}, "$inc": {"attempts": 1}},
+            sort=[("run_after", 1)],
+        )
+
+    async def _acquire(self, lock: str) -> bool:
+        now = _now_utc()
+        try:
+            # Upserting a lock that is held by someone else clashes on _id
+            await self.locks.collection.update_one(
+                {"_id": lock, "$or": [{"owner": self.id}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"owner": self.id, "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _release(self, lock: str):
+        await self.locks.delete_one({"_id": lock, "owner": self.id})
+
+    async def _claim(self) -> Optional[dict]:
+        for lock in sorted(set(JOB_LOCKS.values()) - set(self._locks.values())):
+            kinds = {"$in": [kind for kind, name in JOB_LOCKS.items() if name == lock]}
+            if not await self.jobs.exists(self._claimable(kinds)) or not await self._acquire(lock): continue
+
+            job = await self._claim_one(kinds)
+            if job is not None:
+                self._locks[job["_id"]] = lock
+                return job
+            await self._release(lock)
+
+        return await self._claim_one({"$nin": list(JOB_LOCKS)})
+
+    async def _dispatch(self):
+        while True:
+            if len(self._running) < self.workers:
+                job = await self._claim()
+                if job is not None:
+                    self._running[job["_id"]] = asyncio.create_task(self._execute(job))
+                    continue
+
+            self._wakeup.clear()
+            try: await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError: pass
+
+    async def _execute(self, job: dict):
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, run_job, str(job["_id"]), job["kind"], job["params"])
+            await self.jobs.update_by_id(job["_id"], {"status": "succeeded", "result": result, "error": None, "updated_at": _now_utc()})
+        except Exception as err:
+            if isinstance(err, BrokenProcessPool):
+                self.executor = self._new_executor()
+
+            now = _now_utc()
+            if job["attempts"] < JOB_MAX_ATTEMPTS:
+                update = {"status": "queued", "run_after": now + timedelta(seconds=2 ** job["attempts"])}
+            else:
+                update = {"status": "failed"}
+            await self.jobs.update_by_id(job["_id"], {**update, "error": f"{type(err).__name__}: {err}", "updated_at": now})
+        finally:
+            self._running.pop(job["_id"], None)
+            lock = self._locks.pop(job["_id"], None)
+            if lock: await self._release(lock)
+            self.notify()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            now = _now_utc()
+            await self.jobs.collection.update_many(
+                {"status": "running", "lease_until": {"$lt": now}, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+                {"$set": {"status": "failed", "error": "Worker lost while running the job", "updated_at": now}},
+            )
+            if self._running:
+                await self.jobs.collection.update_many(
+                    {"_id": {"$in": list(self._running)}, "status": "running"},
+                    {"$set": {"lease_until": _now_utc() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+                )
+            if self._locks:
+                await self.locks.collection.update_many(
+                    {"_id": {"$in": list(set(self._locks.values()))}, "owner": self.id},
+                    {"$set": {"lease_until": _now_utc() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+                )
+
+dispatcher = JobDispatcher()
+
+# -----------------------------------------------------------------------------
+# Routes
+# -----------------------------------------------------------------------------
+@router.post("", response_model=JobPublic, status_code=202)
+async def create_job(payload: JobRequest, principal: dict = Depends(get_current_principal)):
+    if payload.kind not in JOB_HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind, expected one of {sorted(JOB_HANDLERS)}")
+    # Bad params would otherwise only fail inside a worker, and be retried JOB_MAX_ATTEMPTS times
+    try: params = validate_job_params(payload.kind, payload.params)
+    except ValueError as err: raise HTTPException(status_code=400, detail=f"Invalid params for {payload.kind}: {err}")
+
+    jobs = Database(JOBS_COLL)
+    active = await jobs.count({"owner": principal["sub"], "status": {"$in": ["queued", "running"]}})
+    if active >= JOB_MAX_ACTIVE_PER_USER:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many active jobs")
+
+    now = _now_utc()
+    job = {
+        "kind": payload.kind,
+        "params": params,
+        "owner": principal["sub"],
+        "status": "queued",
+        "attempts": 0,
+        "progress": None,
+        "result": None,
+        "error": None,
+        "run_after": now,
+        "created_at": now,
+        "updated_at": now
+    }
+    job["_id"] = ObjectId(await jobs.insert(job))
+    dispatcher.notify()
+    return job_doc_to_public(job)
+
+@router.get("/{job_id}", response_model=JobPublic)
+async def get_job(job_id: str, principal: dict = Depends(get_current_principal)):
+    try: job = await Database(JOBS_COLL).find_one({"_id": ObjectId(job_id), "owner": principal["sub"]})
+    except InvalidId: job = None
+    if not job: raise HTTPException(status_code=404, detail="Job not found")
+    return job_doc_to_public(job)
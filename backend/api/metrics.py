@@ -0,0 +1,130 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from typing import Dict, List, Tuple
+import os
+import time
+import uuid
+
+# The timing primitives live in utils.metrics so the data layer and job workers can record without FastAPI
+from utils.metrics import LATENCY_BUCKETS, Histogram, gauge_collectors, lock, operation_latency
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+router = APIRouter()
+
+# The sampling profiler is opt-in twice: enabled on the server, then requested per call with the header
+PROFILING_ENABLED = os.getenv("METRICS_PROFILING_ENABLED", "0") == "1"
+PROFILE_HEADER = b"x-profile"
+PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR", "profiles")
+
+request_counts: Dict[Tuple[str, str, int], int] = {}
+request_latency: Dict[Tuple[str, str], Histogram] = {}
+in_flight = 0
+
+# -----------------------------------------------------------------------------
+# Middleware
+# -----------------------------------------------------------------------------
+def route_template(scope) -> str:
+    """Full path template of the matched route, e.g. "/auth/login", or "unmatched"."""
+    # Newer FastAPI includes routers lazily: scope["route"] is the router's own route, without the include prefix,
+    # and the full template is only on the effective route context. Older versions copy prefixed routes instead.
+    effective = (scope.get("fastapi") or {}).get("effective_route_context")
+    path_format = getattr(effective, "path_format", None)
+    if path_format: return path_format
+
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (cheaper than BaseHTTPMiddleware) recording request count, in-flight requests and
+    latency per route template. Requests carrying `X-Profile: 1` are run under a sampling profiler when
+    METRICS_PROFILING_ENABLED is set; the report is written to METRICS_PROFILE_DIR and named in `X-Profile-Id`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        global in_flight
+        status_code = 500
+        profile_id = None
+        if PROFILING_ENABLED and dict(scope["headers"]).get(PROFILE_HEADER) == b"1":
+            profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if profile_id:
+                    message.setdefault("headers", []).append((b"x-profile-id", profile_id.encode()))
+            await send(message)
+
+        in_flight += 1
+        start = time.perf_counter()
+        try:
+            if profile_id: await self._profiled(profile_id, scope, receive, send_wrapper)
+            else: await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight -= 1
+            elapsed = time.perf_counter() - start
+            key = (scope["method"], route_template(scope))
+            with lock:
+                histogram = request_latency.get(key)
+                if histogram is None: histogram = request_latency[key] = Histogram()
+                histogram.observe(elapsed)
+                count_key = key + (status_code,)
+                request_counts[count_key] = request_counts.get(count_key, 0) + 1
+
+    async def _profiled(self, profile_id: str, scope, receive, send):
+        from pyinstrument import Profiler  # Optional dependency, only needed when profiling is enabled
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try: await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(os.path.join(PROFILE_DIR, f"{profile_id}.html"), "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+
+# -----------------------------------------------------------------------------
+# Exposition
+# -----------------------------------------------------------------------------
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{str(value)}"' for name, value in labels.items())
+
+def _render_histogram(lines: List[str], name: str, histograms: Dict[tuple, Histogram], label_names: Tuple[str, ...]):
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        labels = _labels(**dict(zip(label_names, key)))
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+def render() -> str:
+    lines = ["# TYPE http_requests_in_flight gauge", f"http_requests_in_flight {in_flight}", "# TYPE http_requests_total counter"]
+    with lock:
+        for (method, route, status_code), count in sorted(request_counts.items()):
+            lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status_code)}}} {count}")
+        _render_histogram(lines, "http_request_duration_seconds", request_latency, ("method", "route"))
+        _render_histogram(lines, "operation_duration_seconds", operation_latency, ("component", "operation"))
+
+    for prefix, collector in gauge_collectors.items():
+        for key, value in collector().items():
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
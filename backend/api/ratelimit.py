@@ -0,0 +1,136 @@
+from fastapi import HTTPException, Request, status
+from collections import OrderedDict
+from typing import Optional, Tuple
+import math
+import os
+import time
+
+from utils.metrics import register_gauges
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+# Each bucket holds up to BURST tokens and refills at RATE tokens per second
+AUTH_IP_RATE = float(os.getenv("AUTH_IP_RATE", "1"))
+AUTH_IP_BURST = float(os.getenv("AUTH_IP_BURST", "20"))
+AUTH_USER_RATE = float(os.getenv("AUTH_USER_RATE", "0.2"))
+AUTH_USER_BURST = float(os.getenv("AUTH_USER_BURST", "5"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "0") == "1"
+
+# -----------------------------------------------------------------------------
+# Backends
+# -----------------------------------------------------------------------------
+class LocalTokenBuckets:
+    """
+    Per-process token buckets in an LRU-ordered dict: O(1) per check, at most `max_keys` entries.
+
+    When full, the least recently used key is dropped. Usually its bucket has refilled by then, and dropping
+    it changes nothing. Under a flood of fresh keys it may still be draining, and dropping it resets that
+    key's limit. Those drops are counted in `forced_evictions`; size RATE_LIMIT_MAX_KEYS above the number of
+    keys active within burst / rate seconds to keep them at zero.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [tokens, last update, time the bucket is full again]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.evictions = self.forced_evictions = 0
+
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now, now]
+            if len(self._buckets) > self.max_keys:
+                _, oldest = self._buckets.popitem(last=False)
+                if oldest[2] <= now: self.evictions += 1
+                else: self.forced_evictions += 1
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        allowed = bucket[0] >= 1
+        if allowed: bucket[0] -= 1
+        bucket[2] = now + (burst - bucket[0]) / rate
+        return (True, 0.0) if allowed else (False, (1 - bucket[0]) / rate)
+
+    def size(self) -> int: return len(self._buckets)
+
+
+class RedisTokenBuckets:
+    """Token buckets shared by every worker, updated atomically by a Lua script. Idle keys expire on their own."""
+
+    SCRIPT = """
+    local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed, retry = 0, (1 - tokens) / rate
+    if tokens >= 1 then tokens, allowed, retry = tokens - 1, 1, 0 end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(retry)}
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # Optional dependency, only needed for multi-worker deployments
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+        self.evictions = self.forced_evictions = 0
+
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        allowed, retry = await self._script(keys=[f"resume-assist:ratelimit:{key}"], args=[rate, burst, time.time()])
+        return bool(allowed), float(retry)
+
+    def size(self) -> int: return -1
+
+buckets = RedisTokenBuckets(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else LocalTokenBuckets()
+_rejected = {"ip": 0, "user": 0}
+
+register_gauges("rate_limit", lambda: {
+    "keys": buckets.size(),
+    "evictions": buckets.evictions,
+    "forced_evictions": buckets.forced_evictions,
+    "rejected_ip": _rejected["ip"],
+    "rejected_user": _rejected["user"],
+})
+
+# -----------------------------------------------------------------------------
+# Dependencies
+# -----------------------------------------------------------------------------
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded: return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+async def _enforce(kind: str, key: str, rate: float, burst: float):
+    allowed, retry_after = await buckets.take(f"{kind}:{key}", rate, burst)
+    if not allowed:
+        _rejected[kind] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+async def limit_by_ip(request: Request):
+    """Router-wide limit per client IP."""
+    await _enforce("ip", client_ip(request), AUTH_IP_RATE, AUTH_IP_BURST)
+
+async def limit_by_username(request: Request):
+    """
+    Per-username limit for routes that take a username in the JSON body (login, register).
+
+    Keyed on (username, client IP): requests for someone else's username from other addresses cannot
+    drain the owner's bucket and lock them out. Spraying one username from many addresses is bounded by
+    the per-IP limit instead.
+    """
+    try: username: Optional[str] = (await request.json()).get("username")
+    except Exception: username = None
+    if isinstance(username, str) and username:
+        await _enforce("user", f"{username.lower()}@{client_ip(request)}", AUTH_USER_RATE, AUTH_USER_BURST)
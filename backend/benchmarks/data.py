@@ -0,0 +1,270 @@
+"""
+Data-layer benchmarks for `database.Database` and the user indexes, run directly against Mongo (no HTTP).
+
+Uses an in-memory Mongo (mongomock-motor) unless --mongo-uri is given. mongomock has no query planner,
+every lookup is a scan with or without indexes, so index and scaling numbers are only meaningful against
+a real mongod; the in-memory runs check that the benchmarks work and show Python-side costs.
+
+    cd backend
+    python -m benchmarks.data users --sizes 10000,100000,1000000 --mongo-uri mongodb://localhost:27017
+    python -m benchmarks.data reads --documents 1000000 --mongo-uri mongodb://localhost:27017
+    python -m benchmarks.data bulk --documents 100000 --batch-sizes 10,100,1000,10000 --latency-ms 1
+"""
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+from bson import ObjectId
+
+from benchmarks.run import _percentile, mongo_latency
+
+USERS_COLL = "users"
+RESUMES_COLL = "bench_resumes"
+
+# -----------------------------------------------------------------------------
+# Setup
+# -----------------------------------------------------------------------------
+async def _connect(args):
+    import database
+
+    if args.mongo_uri:
+        database.MONGO_URI = args.mongo_uri
+        await database.connect()
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        database._client = AsyncMongoMockClient()
+    return database.get_client()[f"resume_assist_bench_{uuid.uuid4().hex[:8]}"]
+
+async def _timed(operation: Callable[[int], Awaitable], samples: int) -> dict:
+    latencies = []
+    for i in range(samples):
+        start = time.perf_counter()
+        await operation(i)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "samples": samples,
+        "mean_ms": sum(latencies) / samples * 1000,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+def _print(label: str, summary: dict):
+    extra = "  ".join(f"{key} {value}" for key, value in summary.items() if key not in ("samples", "mean_ms", "p50_ms", "p99_ms"))
+    print(f"{label:<40} mean {summary['mean_ms']:>9.3f} ms  p50 {summary['p50_ms']:>9.3f} ms  p99 {summary['p99_ms']:>9.3f} ms  {extra}")
+
+# -----------------------------------------------------------------------------
+# Users (register / login lookups)
+# -----------------------------------------------------------------------------
+def _user(i: int, prefix: str = "u") -> dict:
+    return {
+        "username": f"{prefix}{i}",
+        "name": "Bench User",
+        "email": f"{prefix}{i}@example.com",
+        "phone_number": f"{prefix}{i:010d}",
+        "password_hash": "$argon2id$v=19$m=65536,t=3,p=4$bench",
+        "token_version": 0,
+    }
+
+async def _seed_users(users, start: int, stop: int, chunk: int = 10000):
+    for offset in range(start, stop, chunk):
+        await users.insert_many([_user(i) for i in range(offset, min(stop, offset + chunk))], ordered=False)
+
+async def bench_users(db, args) -> Dict[str, dict]:
+    """
+    The Mongo side of register and login at growing user counts, without and with the unique indexes.
+
+    "scan" is the old path: a `$or` pre-check on username/email/phone before the insert, and an unindexed
+    username lookup. "indexed" is the current one: the insert alone (uniqueness comes from the indexes)
+    and an indexed lookup. Argon2 is left out, it costs the same at every size.
+    """
+    from database.indexes import ensure_indexes
+
+    users, rng, results, seeded = db[USERS_COLL], random.Random(0), {}, 0
+    for size in args.sizes:
+        # Bulk-load without the indexes, as a restore would, then build them once for the indexed runs
+        await users.drop_indexes()
+        await _seed_users(users, seeded, size)
+        seeded = size
+
+        for mode in ("scan", "indexed"):
+            if mode == "indexed": await ensure_indexes(db)
+            prefix = f"r{mode}{size}-"
+
+            async def register(i):
+                doc = _user(i, prefix)
+                if mode == "scan":
+                    await users.find_one({"$or": [{"username": doc["username"]}, {"email": doc["email"]}, {"phone_number": doc["phone_number"]}]})
+                await users.insert_one(doc)
+
+            async def login(i): await users.find_one({"username": f"u{rng.randrange(size)}"})
+
+            results[f"register-{mode}-{size}"] = await _timed(register, args.samples)
+            results[f"login-{mode}-{size}"] = await _timed(login, args.samples)
+            await users.delete_many({"username": {"$regex": f"^{prefix}"}})
+            for name in ("register", "login"): _print(f"{name} {mode} {size} users", results[f"{name}-{mode}-{size}"])
+    return results
+
+# -----------------------------------------------------------------------------
+# Reads (full scans, streaming, pagination, projections)
+# -----------------------------------------------------------------------------
+SKILLS = ["python", "java", "sql", "aws", "docker", "react", "spark", "kubernetes", "go", "terraform"]
+
+def _resume(i: int, rng: random.Random) -> dict:
+    return {
+        "filename": f"resume_{i}.pdf",
+        "name": f"Candidate {i}",
+        "skills": rng.sample(SKILLS, 4),
+        "years": rng.randrange(30),
+        "text": " ".join(rng.choice(SKILLS) for _ in range(300)),
+    }
+
+async def _once(operation: Callable[[], Awaitable]) -> dict:
+    """Wall time of one run, then Python heap peak (tracemalloc) of a second run."""
+    start = time.perf_counter()
+    await operation()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        await operation()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally: tracemalloc.stop()
+    return {"samples": 1, "mean_ms": seconds * 1000, "p50_ms": seconds * 1000, "p99_ms": seconds * 1000, "peak_mb": round(peak / 2**20, 1)}
+
+async def bench_reads(db, args) -> Dict[str, dict]:
+    """
+    Reading every resume: `find_all` (materialized, full or projected) vs `iter_find` and `find_page`
+    (streamed, projected), and `exists` vs fetching the whole document.
+    """
+    from database import Database
+
+    resumes, rng = Database(RESUMES_COLL, db), random.Random(0)
+    for offset in range(0, args.documents, 10000):
+        await resumes.insert_many([_resume(i, rng) for i in range(offset, min(args.documents, offset + 10000))])
+    projection = {"filename": 1, "skills": 1}
+
+    async def find_all(): len(await resumes.find_all())
+    async def find_all_projected(): len(await resumes.find_all(projection=projection))
+
+    async def iter_find():
+        async for _ in resumes.iter_find(projection=projection, batch_size=args.batch_size): pass
+
+    async def find_page():
+        after = None
+        while True:
+            _, after = await resumes.find_page(after=after, limit=args.batch_size, projection=projection)
+            if after is None: break
+
+    results = {}
+    for name, operation in (("find_all", find_all), ("find_all-projected", find_all_projected), ("iter_find", iter_find), ("find_page", find_page)):
+        results[name] = await _once(operation)
+        _print(f"{name} {args.documents} docs", results[name])
+
+    # Hits are spread over the collection; the queried field is unindexed on purpose, so both scan alike
+    names = [f"Candidate {rng.randrange(args.documents)}" for _ in range(args.samples)]
+    async def exists(i): await resumes.exists({"name": names[i]})
+    async def find_one(i): await resumes.find_one({"name": names[i]})
+    for name, operation in (("exists", exists), ("find_one", find_one)):
+        results[name] = await _timed(operation, args.samples)
+        _print(f"{name} {args.documents} docs", results[name])
+    return results
+
+# -----------------------------------------------------------------------------
+# Writes (per-document calls vs bulk_write)
+# -----------------------------------------------------------------------------
+async def bench_bulk(db, args) -> Dict[str, dict]:
+    """
+    Importing and then removing --documents resumes: one call per document vs `bulk_write` at each
+    batch size, ordered and unordered. (Deletes rather than updates for the second pass: mongomock cannot
+    apply pymongo 4.9+ `UpdateOne`/`ReplaceOne` in a bulk write.) --latency-ms adds an awaited round-trip delay to the in-memory
+    Mongo, which is what batching saves; a real server brings its own.
+    """
+    from pymongo import DeleteOne, InsertOne
+    from database import Database
+
+    rng = random.Random(0)
+    docs = [_resume(i, rng) for i in range(args.documents)]
+    latency = mongo_latency(args.latency_ms / 1000) if args.latency_ms and not args.mongo_uri else contextlib.nullcontext({})
+
+    async def per_document(resumes):
+        ids = [await resumes.insert(dict(doc)) for doc in docs]
+        assert await resumes.count() == args.documents
+        for doc_id in ids: await resumes.delete_by_id(doc_id)
+
+    def batched(batch_size: int, ordered: bool):
+        async def write(resumes):
+            ids = [ObjectId() for _ in docs]
+            await resumes.bulk_write((InsertOne({"_id": doc_id, **doc}) for doc_id, doc in zip(ids, docs)), batch_size, ordered)
+            assert await resumes.count() == args.documents
+            await resumes.bulk_write((DeleteOne({"_id": doc_id}) for doc_id in ids), batch_size, ordered)
+        return write
+
+    variants = {"per-document": per_document}
+    for batch_size in args.batch_sizes:
+        variants[f"bulk-{batch_size}"] = batched(batch_size, True)
+        variants[f"bulk-{batch_size}-unordered"] = batched(batch_size, False)
+
+    results = {}
+    with latency as mongo:
+        for name, write in variants.items():
+            resumes = Database(f"{RESUMES_COLL}_{name}", db)
+            calls = mongo.get("calls", 0)
+            start = time.perf_counter()
+            await write(resumes)
+            seconds = time.perf_counter() - start
+            assert await resumes.count() == 0
+            results[name] = {"samples": 1, "mean_ms": seconds * 1000, "p50_ms": seconds * 1000, "p99_ms": seconds * 1000, "ops_per_s": round(2 * args.documents / seconds)}
+            if mongo: results[name]["round_trips"] = mongo["calls"] - calls
+            await resumes.drop_collection()
+            _print(f"{name} {args.documents} docs", results[name])
+    return results
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+BENCHMARKS = {"users": bench_users, "reads": bench_reads, "bulk": bench_bulk}
+
+async def run(args) -> dict:
+    db = await _connect(args)
+    try: return {"meta": {"timestamp": time.time(), "mongo": "external" if args.mongo_uri else "mongomock"}, args.benchmark: await BENCHMARKS[args.benchmark](db, args)}
+    finally: await db.client.drop_database(db.name)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--mongo-uri", default=None, help="use a real MongoDB instead of the in-memory stand-in")
+    common.add_argument("--output", default=None, help="also write the results as JSON")
+    parser = argparse.ArgumentParser(description="Benchmark the Mongo data layer.")
+    benchmarks = parser.add_subparsers(dest="benchmark", required=True)
+
+    users = benchmarks.add_parser("users", parents=[common], help="register/login lookups at growing user counts, with and without indexes")
+    users.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[10000, 100000, 1000000])
+    users.add_argument("--samples", type=int, default=200, help="timed operations per size and mode")
+
+    reads = benchmarks.add_parser("reads", parents=[common], help="full scans vs streamed and paginated reads, with projections")
+    reads.add_argument("--documents", type=int, default=1000000)
+    reads.add_argument("--batch-size", type=int, default=1000, help="iter_find batch size and find_page page size")
+    reads.add_argument("--samples", type=int, default=50, help="timed exists/find_one lookups")
+
+    bulk = benchmarks.add_parser("bulk", parents=[common], help="per-document writes vs bulk_write at several batch sizes")
+    bulk.add_argument("--documents", type=int, default=100000)
+    bulk.add_argument("--batch-sizes", type=lambda value: [int(size) for size in value.split(",")], default=[10, 100, 1000, 10000])
+    bulk.add_argument("--latency-ms", type=float, default=1.0, help="round-trip delay added to the in-memory Mongo")
+
+    args = parser.parse_args(argv)
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
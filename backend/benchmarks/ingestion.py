@@ -0,0 +1,340 @@
+"""
+Ingestion benchmarks for `database.chroma.ChromaDB` on a generated directory of synthetic resumes.
+
+Each benchmark runs in a temporary working directory with its own `data/` corpus and Chroma store, using
+the deterministic `hashing` embedder unless EMBEDDING_BACKEND says otherwise. Files are plain text and read
+by a plain-text loader (`--loader text`); `--loader unstructured` uses the app's loader instead, which needs
+the `unstructured` package.
+
+    cd backend
+    python -m benchmarks.ingestion incremental --files 2000 --changed 0.01
+    python -m benchmarks.ingestion backends --backends hashing,sentence-transformers
+    python -m benchmarks.ingestion pipeline --files 10000
+    python -m benchmarks.ingestion writes --documents 2000
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.run import _percentile
+
+def _configure_env():
+    # Must run before utils (and so the embedding backends) is imported, config is read at import time
+    os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+    os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "0")
+    os.environ.setdefault("EMBEDDING_WARMUP", "0")
+
+# -----------------------------------------------------------------------------
+# Corpus
+# -----------------------------------------------------------------------------
+SKILLS = ["python", "java", "sql", "aws", "docker", "react", "spark", "kubernetes", "go", "terraform", "airflow", "fastapi"]
+
+def resume_text(i: int, revision: int = 0) -> str:
+    rng = random.Random(i * 1000 + revision)
+    sections = [f"Candidate {i}\n\nExperienced engineer, revision {revision}."]
+    for role in range(rng.randrange(3, 6)):
+        skills = ", ".join(rng.sample(SKILLS, 4))
+        sections.append(f"Role {role}: built services with {skills}. " + " ".join(rng.choice(SKILLS) for _ in range(rng.randrange(60, 120))))
+    return "\n\n".join(sections)
+
+def write_corpus(directory: str, files: int):
+    os.makedirs(directory, exist_ok=True)
+    for i in range(files):
+        with open(os.path.join(directory, f"resume_{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(resume_text(i))
+
+def load_text_file(file_path: str, chunk_size: int, chunk_overlap: int):
+    """Plain-text loader for the ingestion process pool, a stand-in for the unstructured loader."""
+    from langchain.schema import Document
+    from utils import split_documents
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        return split_documents([Document(page_content=f.read(), metadata={"source": file_path})], chunk_size, chunk_overlap)
+
+@contextmanager
+def workspace(args):
+    """A temporary working directory with `data/` and an empty Chroma store, using the chosen loader."""
+    import utils
+    from database import chroma
+
+    cwd, chroma_path, load_and_split = os.getcwd(), chroma.CHROMA_PATH, utils._load_and_split_file
+    with tempfile.TemporaryDirectory(prefix="ingest-bench-") as directory:
+        os.chdir(directory)
+        chroma.CHROMA_PATH = os.path.join(directory, "chroma")
+        if args.loader == "text": utils._load_and_split_file = load_text_file
+        try: yield directory
+        finally:
+            os.chdir(cwd)
+            chroma.CHROMA_PATH, utils._load_and_split_file = chroma_path, load_and_split
+
+# -----------------------------------------------------------------------------
+# Measurement
+# -----------------------------------------------------------------------------
+class CountingEmbeddings:
+    """Wraps an embedder and counts calls and texts, to see how much work an ingestion actually embedded."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.calls = self.texts = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+def counted_store():
+    from database.chroma import ChromaDB
+
+    store = ChromaDB()
+    counter = CountingEmbeddings(store.vectorstore._embedding_function)
+    store.vectorstore._embedding_function = counter
+    return store, counter
+
+def _print(label: str, summary: dict):
+    print(f"{label:<36} " + "  ".join(f"{key} {value}" for key, value in summary.items()))
+
+# -----------------------------------------------------------------------------
+# Incremental re-ingestion
+# -----------------------------------------------------------------------------
+def bench_incremental(args) -> Dict[str, dict]:
+    """
+    Re-ingesting a corpus with the manifest (`incremental=True`) when nothing changed and when a fraction
+    of files changed, against a full re-ingest of the same corpus (the old behaviour).
+    """
+    results = {}
+    with workspace(args):
+        write_corpus("data", args.files)
+        store, counter = counted_store()
+
+        def ingest(label: str, incremental: bool):
+            calls, texts = counter.calls, counter.texts
+            start = time.perf_counter()
+            stats = store.load_and_add_documents_from_directory("data", incremental=incremental)
+            results[label] = {
+                "seconds": round(time.perf_counter() - start, 2),
+                "embedding_calls": counter.calls - calls,
+                "chunks_embedded": counter.texts - texts,
+                **{key: value for key, value in stats.items() if key != "chunks_embedded"},
+            }
+            _print(label, results[label])
+
+        ingest("initial", incremental=True)
+        ingest("unchanged-full", incremental=False)
+        ingest("unchanged-incremental", incremental=True)
+
+        changed = random.Random(0).sample(range(args.files), max(1, int(args.files * args.changed)))
+        for i in changed:
+            with open(os.path.join("data", f"resume_{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(resume_text(i, revision=1))
+        ingest(f"changed-{args.changed:.0%}-incremental", incremental=True)
+        ingest(f"changed-{args.changed:.0%}-full", incremental=False)
+    return results
+
+# -----------------------------------------------------------------------------
+# Embedding backends
+# -----------------------------------------------------------------------------
+def _chunk_texts(files: int) -> List[str]:
+    from langchain.schema import Document
+    from utils import split_documents
+
+    documents = [Document(page_content=resume_text(i), metadata={"source": f"resume_{i}.txt"}) for i in range(files)]
+    return [chunk.page_content for chunk in split_documents(documents)]
+
+def _latency_ms(latencies: List[float], pct: float) -> float:
+    return round(_percentile(sorted(latencies), pct) * 1000, 3)
+
+def bench_backends(args) -> Dict[str, dict]:
+    """
+    Per registered embedding backend: document throughput (chunks/s in `--batch-size` calls) and query
+    latency, one query at a time and from `--threads` threads at once (where dynamic batching kicks in).
+    Backends that cannot be built here (missing package, no credentials or network) are reported as skipped.
+    """
+    from utils.embedding_backends import EMBEDDING_BACKENDS, get_embeddings
+
+    texts, queries = _chunk_texts(args.files), [f"{skill} engineer with {other}" for skill in SKILLS for other in SKILLS]
+    results = {}
+    for backend in args.backends or sorted(EMBEDDING_BACKENDS):
+        try:
+            embeddings, model_name = get_embeddings(backend)
+            start = time.perf_counter()
+            embeddings.embed_query("warm up")
+            warm_up = time.perf_counter() - start
+        except Exception as err:
+            results[backend] = {"skipped": f"{type(err).__name__}: {err}".splitlines()[0][:200]}
+            _print(backend, results[backend])
+            continue
+
+        start = time.perf_counter()
+        for offset in range(0, len(texts), args.batch_size): embeddings.embed_documents(texts[offset:offset + args.batch_size])
+        seconds = time.perf_counter() - start
+
+        def timed_query(query: str) -> float:
+            start = time.perf_counter()
+            embeddings.embed_query(query)
+            return time.perf_counter() - start
+
+        sequential = [timed_query(query) for query in queries]
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            start = time.perf_counter()
+            concurrent = list(pool.map(timed_query, queries))
+            concurrent_seconds = time.perf_counter() - start
+
+        results[backend] = {
+            "model": model_name,
+            "warm_up_s": round(warm_up, 3),
+            "chunks": len(texts),
+            "chunks_per_s": round(len(texts) / seconds),
+            "query_p50_ms": _latency_ms(sequential, 50),
+            "query_p99_ms": _latency_ms(sequential, 99),
+            f"query_x{args.threads}_p50_ms": _latency_ms(concurrent, 50),
+            f"query_x{args.threads}_p99_ms": _latency_ms(concurrent, 99),
+            f"queries_x{args.threads}_per_s": round(len(queries) / concurrent_seconds),
+        }
+        _print(backend, results[backend])
+    return results
+
+# -----------------------------------------------------------------------------
+# Load / split / embed pipeline
+# -----------------------------------------------------------------------------
+def _max_rss_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / 2**20 if sys.platform == "darwin" else peak / 2**10, 1)
+
+def _load_all(loader: str):
+    """The corpus as the old path had it: every file loaded into one list by a single process."""
+    from utils import list_directory_files, load_documents_from_directory
+    from langchain.schema import Document
+
+    if loader == "unstructured": return load_documents_from_directory("data")
+    documents = []
+    for path in list_directory_files("data"):
+        documents.append(Document(page_content=path.read_text(encoding="utf-8"), metadata={"source": str(path)}))
+    return documents
+
+def _ingest_in_child(mode: str, directory: str, loader: str) -> dict:
+    """Runs in a fresh process, so its peak RSS belongs to this ingestion alone."""
+    import utils
+    from database import chroma
+
+    os.chdir(directory)
+    chroma.CHROMA_PATH = os.path.join(directory, f"chroma-{mode}")
+    if loader == "text": utils._load_and_split_file = load_text_file
+    store = chroma.ChromaDB()
+    rss_before = _max_rss_mb(resource.RUSAGE_SELF)
+
+    start = time.perf_counter()
+    if mode == "load-all":
+        # The old ChromaDB.load_and_add_documents_from_directory: load everything, split everything, add once.
+        # A single add fails past Chroma's max batch size (about 5.5k chunks), so the add is sliced to that.
+        chunks = utils.split_documents(_load_all(loader))
+        max_batch = store.vectorstore._client.get_max_batch_size()
+        for offset in range(0, len(chunks), max_batch): store.vectorstore.add_documents(chunks[offset:offset + max_batch])
+        store.vectorstore.persist()
+        count = len(chunks)
+    else:
+        count = store.load_and_add_documents_from_directory("data")["chunks_embedded"]
+    return {
+        "seconds": round(time.perf_counter() - start, 2),
+        "chunks": count,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": _max_rss_mb(resource.RUSAGE_SELF),
+        "loader_workers_peak_rss_mb": _max_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+def bench_pipeline(args) -> Dict[str, dict]:
+    """
+    Wall time and peak RSS of ingesting `--files` resumes: the old load-all/split-all/add-all path vs the
+    streaming pipeline (process-pool loading, chunks embedded and added in bounded batches). Each run gets
+    a fresh process and store.
+    """
+    results = {}
+    with workspace(args) as directory:
+        write_corpus("data", args.files)
+        for mode in ("load-all", "streaming"):
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results[mode] = executor.submit(_ingest_in_child, mode, directory, args.loader).result()
+            _print(f"{mode} {args.files} files", results[mode])
+    return results
+
+# -----------------------------------------------------------------------------
+# Single-document writes
+# -----------------------------------------------------------------------------
+def bench_writes(args) -> Dict[str, dict]:
+    """
+    Documents arriving one at a time through `ChromaDB.add_documents`: written and persisted on every call
+    (`write_batch_size=1`, the old behaviour) vs the write-behind buffer at each of `--batch-sizes`.
+    The final `flush()` is part of the timing.
+    """
+    from langchain.schema import Document
+    from database.chroma import ChromaDB
+    from database import chroma
+
+    documents = [Document(page_content=text, metadata={"source": f"resume_{i}.txt", "id": f"doc:{i}"}) for i, text in enumerate(_chunk_texts(args.documents))]
+    documents = documents[:args.documents]
+    results = {}
+    with workspace(args) as directory:
+        for batch_size in [1] + args.batch_sizes:
+            chroma.CHROMA_PATH = os.path.join(directory, f"chroma-{batch_size}")
+            store = ChromaDB(write_batch_size=batch_size)
+            start = time.perf_counter()
+            for document in documents: store.add_documents([document])
+            store.flush()
+            seconds = time.perf_counter() - start
+            label = "unbatched" if batch_size == 1 else f"batch-{batch_size}"
+            results[label] = {"documents": len(documents), "seconds": round(seconds, 2), "docs_per_s": round(len(documents) / seconds)}
+            _print(label, results[label])
+    return results
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+BENCHMARKS = {"incremental": bench_incremental, "backends": bench_backends, "pipeline": bench_pipeline, "writes": bench_writes}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--loader", choices=["text", "unstructured"], default="text")
+    common.add_argument("--output", default=None, help="also write the results as JSON")
+    parser = argparse.ArgumentParser(description="Benchmark resume ingestion into Chroma.")
+    benchmarks = parser.add_subparsers(dest="benchmark", required=True)
+
+    incremental = benchmarks.add_parser("incremental", parents=[common], help="re-ingest time and embedding work on an unchanged and a partly changed corpus")
+    incremental.add_argument("--files", type=int, default=2000)
+    incremental.add_argument("--changed", type=float, default=0.01, help="fraction of files rewritten before the last runs")
+
+    backends = benchmarks.add_parser("backends", parents=[common], help="chunks/s and query latency per embedding backend")
+    backends.add_argument("--backends", type=lambda value: value.split(","), default=None, help="comma separated backend names (default: all registered)")
+    backends.add_argument("--files", type=int, default=500, help="resumes to split into the chunk corpus")
+    backends.add_argument("--batch-size", type=int, default=64, help="chunks per embed_documents call")
+    backends.add_argument("--threads", type=int, default=16, help="concurrent query callers")
+
+    pipeline = benchmarks.add_parser("pipeline", parents=[common], help="wall time and peak RSS, load-all path vs the streaming pipeline")
+    pipeline.add_argument("--files", type=int, default=10000)
+
+    writes = benchmarks.add_parser("writes", parents=[common], help="single-document add_documents throughput with and without write batching")
+    writes.add_argument("--documents", type=int, default=2000)
+    writes.add_argument("--batch-sizes", type=lambda value: [int(size) for size in value.split(",")], default=[16, 64, 256])
+
+    args = parser.parse_args(argv)
+    _configure_env()
+    results = {"meta": {"timestamp": time.time(), "embedding_backend": os.environ["EMBEDDING_BACKEND"], "loader": args.loader}, args.benchmark: BENCHMARKS[args.benchmark](args)}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
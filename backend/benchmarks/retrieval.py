@@ -0,0 +1,295 @@
+"""
+Retrieval benchmarks for `database.chroma.ChromaDB` on a synthetic resume corpus written straight into a
+temporary store (no file loading), using the deterministic `hashing` embedder unless EMBEDDING_BACKEND says
+otherwise.
+
+    cd backend
+    python -m benchmarks.retrieval queries --resumes 2000 --concurrency 1,16,256
+    python -m benchmarks.retrieval bm25 --chunks 100000
+    python -m benchmarks.retrieval grading --sizes 1000,10000,100000 --jobs 1,8
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.ingestion import SKILLS, _configure_env, _print, resume_text, workspace
+from benchmarks.run import _percentile
+
+# -----------------------------------------------------------------------------
+# Corpus
+# -----------------------------------------------------------------------------
+def resume_chunks(resumes: int, start: int = 0) -> list:
+    """Chunks of synthetic resumes `start` to `start + resumes`, with `split_documents` ids."""
+    from langchain.schema import Document
+    from utils import split_documents
+
+    return split_documents([Document(page_content=resume_text(i), metadata={"source": f"data/resume_{i}.txt"}) for i in range(start, start + resumes)])
+
+def corpus_chunks(chunks: int) -> list:
+    """The first `chunks` chunks of as many synthetic resumes as it takes."""
+    documents, resumes = [], 0
+    while len(documents) < chunks:
+        batch = max(1, (chunks - len(documents)) // 3)
+        documents.extend(resume_chunks(batch, start=resumes))
+        resumes += batch
+    return documents[:chunks]
+
+def seeded_store(resumes: int = 0, chunks: Optional[list] = None):
+    """A ChromaDB in the current workspace holding `chunks`, or the chunks of `resumes` resumes."""
+    from database.chroma import ChromaDB
+
+    store = ChromaDB()
+    seeded_store_add(store, chunks if chunks is not None else resume_chunks(resumes))
+    return store
+
+def seeded_store_add(store, chunks: list):
+    """Write `chunks` to `store` in slices Chroma accepts in one add."""
+    batch_size = store.vectorstore._client.get_max_batch_size()
+    for offset in range(0, len(chunks), batch_size): store.add_documents(chunks[offset:offset + batch_size])
+    store.flush()
+
+def job_queries(count: int, offset: int = 0) -> List[str]:
+    return [f"{SKILLS[i % len(SKILLS)]} engineer with {SKILLS[(i // len(SKILLS)) % len(SKILLS)]}, req {i}" for i in range(offset, offset + count)]
+
+def _summary(latencies: List[float], seconds: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "queries": len(latencies),
+        "queries_per_s": round(len(latencies) / seconds),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+# -----------------------------------------------------------------------------
+# Concurrent queries
+# -----------------------------------------------------------------------------
+async def _concurrent_aquery(store, queries: List[str], concurrency: int) -> dict:
+    """`concurrency` callers issuing `aquery` back to back until every query is answered."""
+    latencies, pending = [], iter(queries)
+
+    async def caller():
+        for query in pending:
+            start = time.perf_counter()
+            await store.aquery(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return _summary(latencies, time.perf_counter() - start)
+
+async def _batched(store, queries: List[str], batch_size: int) -> dict:
+    """The same queries sent as `aquery_many` calls of `batch_size`, uncached; each query's latency is its batch's."""
+    store._query_cache.clear()
+    latencies = []
+    start = time.perf_counter()
+    for offset in range(0, len(queries), batch_size):
+        batch_start = time.perf_counter()
+        await store.aquery_many(queries[offset:offset + batch_size])
+        latencies.extend([time.perf_counter() - batch_start] * len(queries[offset:offset + batch_size]))
+    return _summary(latencies, time.perf_counter() - start)
+
+def bench_queries(args) -> Dict[str, dict]:
+    """
+    Vector query latency and throughput at each concurrency: `aquery` with every query new (cache misses),
+    `aquery` repeating those queries (cache hits), and `aquery_many` batches of the same size.
+    """
+    results = {}
+    with workspace(args):
+        store = seeded_store(args.resumes)
+        for concurrency in args.concurrency:
+            queries = job_queries(max(args.queries, concurrency), offset=concurrency * 100000)
+            store._query_cache.clear()
+            for label, run in (
+                (f"aquery-miss-x{concurrency}", lambda: _concurrent_aquery(store, queries, concurrency)),
+                (f"aquery-hit-x{concurrency}", lambda: _concurrent_aquery(store, queries, concurrency)),
+                (f"aquery_many-{concurrency}", lambda: _batched(store, queries, concurrency)),
+            ):
+                results[label] = asyncio.run(run())
+                _print(label, results[label])
+    return results
+
+# -----------------------------------------------------------------------------
+# BM25 index
+# -----------------------------------------------------------------------------
+def _latencies(search, queries: List[str]) -> dict:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"p50_ms": round(_percentile(latencies, 50) * 1000, 3), "p99_ms": round(_percentile(latencies, 99) * 1000, 3)}
+
+def bench_bm25(args) -> Dict[str, dict]:
+    """
+    `BM25Index` on --chunks chunks: build time and Python heap per chunk (tracemalloc; the index references
+    the chunk texts and metadata rather than copying them, so add `text_bytes_per_chunk` for the total), snapshot save/load, then lexical, hybrid and vector query latency through a ChromaDB holding
+    the same chunks.
+
+    Two query shapes: a rare term (a candidate number, a handful of postings) and a job-style query on
+    skill terms. The synthetic corpus draws on only a dozen skills, so each skill's postings cover most
+    chunks; that is the worst case for a term-at-a-time scorer, real resumes spread wider.
+    """
+    from database.bm25 import BM25Index
+
+    chunks = corpus_chunks(args.chunks)
+    ids, texts, metadatas = [doc.metadata["id"] for doc in chunks], [doc.page_content for doc in chunks], [doc.metadata for doc in chunks]
+
+    def build() -> BM25Index:
+        index = BM25Index()
+        for offset in range(0, len(ids), args.batch_size):
+            index.add(ids[offset:offset + args.batch_size], texts[offset:offset + args.batch_size], metadatas[offset:offset + args.batch_size])
+        index._unsaved = []  # Nothing to persist without a path; don't let the log records count as index memory
+        return index
+
+    start = time.perf_counter()
+    index = build()
+    build_seconds = time.perf_counter() - start
+    del index
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        index = build()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally: tracemalloc.stop()
+    results = {"build": {
+        "chunks": len(ids), "terms": len(index.postings), "seconds": round(build_seconds, 2),
+        "chunks_per_s": round(len(ids) / build_seconds), "bytes_per_chunk": round(retained / len(ids)),
+        "text_bytes_per_chunk": round(sum(len(text) for text in texts) / len(ids)),
+    }}
+    _print(f"build {len(ids)} chunks", results["build"])
+
+    with tempfile.TemporaryDirectory() as directory:
+        index.path = os.path.join(directory, "bm25.pkl")
+        start = time.perf_counter()
+        index.compact()
+        save_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        BM25Index(index.path).load()
+        results["persist"] = {"save_s": round(save_seconds, 2), "load_s": round(time.perf_counter() - start, 2), "snapshot_mb": round(os.path.getsize(index.path) / 2**20, 1)}
+    _print("snapshot", results["persist"])
+
+    rare = [str(i) for i in range(1000, 1000 + args.samples)]
+    skills = job_queries(args.samples)
+    for label, queries in (("rare", rare), ("skills", skills)):
+        results[f"index-{label}"] = _latencies(lambda query: index.search(query, 5), queries)
+        _print(f"BM25Index.search {label}", results[f"index-{label}"])
+    del index
+
+    with workspace(args):
+        store = seeded_store(chunks=chunks)
+        for label, queries in (("rare", rare), ("skills", skills)):
+            for name, search in (("lexical_query", store.lexical_query), ("hybrid_query", store.hybrid_query), ("query", store.query)):
+                store._query_cache.clear()
+                results[f"{name}-{label}"] = _latencies(search, queries)
+                _print(f"{name} {label}", results[f"{name}-{label}"])
+    return results
+
+# -----------------------------------------------------------------------------
+# Grading
+# -----------------------------------------------------------------------------
+SECTIONS = ["summary", "experience", "skills", "education"]
+
+def _with_sections(chunks: list) -> list:
+    """Tag each resume's chunks with a section, in order, so grading aggregates over several per resume."""
+    seen: Dict[str, int] = {}
+    for doc in chunks:
+        position = seen[doc.metadata["source"]] = seen.get(doc.metadata["source"], -1) + 1
+        doc.metadata["section"] = SECTIONS[min(position, len(SECTIONS) - 1)]
+    return chunks
+
+def bench_grading(args) -> Dict[str, dict]:
+    """
+    `GradingEngine.grade` as the store grows to each of --sizes resumes: the matrix reload from Chroma that
+    the first grade after a write pays, timed apart from warm grades for each number of job descriptions
+    in --jobs, plus a warm grade restricted to --subset named resumes.
+
+    `resumes_per_s` counts resumes ranked per second for all the job descriptions of the call together;
+    `pairs_per_s` counts (resume, job description) scores.
+    """
+    from utils.grading import GradingEngine
+
+    results, seeded = {}, 0
+    with workspace(args):
+        store = seeded_store(chunks=[])
+        engine = GradingEngine(store)
+        for size in args.sizes:
+            for start in range(seeded, size, args.seed_batch):
+                seeded_store_add(store, _with_sections(resume_chunks(min(args.seed_batch, size - start), start=start)))
+            seeded = size
+            chunks = store.vectorstore._collection.count()
+
+            start = time.perf_counter()
+            engine._load()
+            load_seconds = time.perf_counter() - start
+            results[f"load-{size}"] = {"resumes": size, "chunks": chunks, "seconds": round(load_seconds, 2), "matrix_mb": round(engine._snapshot[1].nbytes / 2**20, 1)}
+            _print(f"load {size} resumes", results[f"load-{size}"])
+
+            for jobs in args.jobs:
+                descriptions = job_queries(jobs)
+                latencies = []
+                for _ in range(args.samples):
+                    start = time.perf_counter()
+                    engine.grade(descriptions, top_k=10)
+                    latencies.append(time.perf_counter() - start)
+                latencies.sort()
+                p50 = _percentile(latencies, 50)
+                results[f"grade-{size}-x{jobs}"] = {
+                    "p50_ms": round(p50 * 1000, 1), "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+                    "resumes_per_s": round(size / p50), "pairs_per_s": round(size * jobs / p50),
+                }
+                _print(f"grade {size} resumes x{jobs} jobs", results[f"grade-{size}-x{jobs}"])
+
+            subset = [f"data/resume_{i}.txt" for i in range(0, size, max(1, size // args.subset))][:args.subset]
+            results[f"grade-{size}-subset"] = _latencies(lambda _: engine.grade(job_queries(1), resumes=subset), range(args.samples))
+            _print(f"grade {len(subset)} of {size} resumes", results[f"grade-{size}-subset"])
+    return results
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+BENCHMARKS = {"queries": bench_queries, "bm25": bench_bm25, "grading": bench_grading}
+
+def _sizes(value: str) -> List[int]: return [int(size) for size in value.split(",")]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--output", default=None, help="also write the results as JSON")
+    parser = argparse.ArgumentParser(description="Benchmark retrieval and grading on a synthetic resume store.")
+    benchmarks = parser.add_subparsers(dest="benchmark", required=True)
+
+    queries = benchmarks.add_parser("queries", parents=[common], help="vector query latency and throughput at several concurrencies")
+    queries.add_argument("--resumes", type=int, default=2000)
+    queries.add_argument("--queries", type=int, default=512, help="queries per variant (at least the concurrency)")
+    queries.add_argument("--concurrency", type=_sizes, default=[1, 16, 256])
+
+    bm25 = benchmarks.add_parser("bm25", parents=[common], help="BM25 build time, memory per chunk, persistence and lexical vs vector query latency")
+    bm25.add_argument("--chunks", type=int, default=100000)
+    bm25.add_argument("--batch-size", type=int, default=5000, help="chunks per BM25Index.add call")
+    bm25.add_argument("--samples", type=int, default=200, help="timed queries per query shape")
+
+    grading = benchmarks.add_parser("grading", parents=[common], help="resumes scored per second as the store grows")
+    grading.add_argument("--sizes", type=_sizes, default=[1000, 10000, 100000])
+    grading.add_argument("--jobs", type=_sizes, default=[1, 8], help="job descriptions per grade call")
+    grading.add_argument("--samples", type=int, default=10, help="timed grade calls per size and job count")
+    grading.add_argument("--subset", type=int, default=100, help="named resumes for the restricted grade")
+    grading.add_argument("--seed-batch", type=int, default=5000, help="resumes chunked and written at a time")
+
+    args = parser.parse_args(argv)
+    args.loader = "text"  # workspace() setting; nothing is loaded from files here
+    _configure_env()
+    results = {"meta": {"timestamp": time.time(), "embedding_backend": os.environ["EMBEDDING_BACKEND"]}, args.benchmark: BENCHMARKS[args.benchmark](args)}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,481 @@
+"""
+Offline benchmark harness for the API routes.
+
+Drives the FastAPI `app` from server.py in-process (no network, no uvicorn) against local stand-ins:
+an in-memory Mongo (mongomock-motor) unless --mongo-uri is given, and the deterministic `hashing`
+embedding backend instead of Bedrock. Results are written as JSON and can be compared to a baseline.
+
+    cd backend
+    pip install -r requirements.txt -r benchmarks/requirements.txt
+    python -m benchmarks.run --concurrency 16 --requests 500 --output bench.json
+    python -m benchmarks.run --output bench.json --baseline baseline.json   # exits 1 on regression
+    python -m benchmarks.run --routes "" --scenarios all                     # before/after comparisons only
+
+Scenarios time several variants of the same workload (e.g. with a feature on and off) and report them side by side.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import uuid
+
+ROUTES = ["root", "ping", "custom-docs", "register", "login", "update", "delete"]
+SCENARIOS = ["async-mongo", "login-load", "user-cache", "claims-only", "refresh", "docs", "login-attack"]
+
+def _configure_env(args):
+    # Must run before server (and so api.auth) is imported, module-level config is read at import time
+    os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+    os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "0")
+    os.environ.setdefault("EMBEDDING_WARMUP", "0")
+    os.environ.setdefault("MONGODB_DB", f"resume_assist_bench_{uuid.uuid4().hex[:8]}")
+    # All in-process requests share one client address, so the limiter would otherwise measure itself
+    for name in ("AUTH_IP_RATE", "AUTH_IP_BURST", "AUTH_USER_RATE", "AUTH_USER_BURST"):
+        os.environ.setdefault(name, "1e9")
+    if args.mongo_uri: os.environ["MONGODB_URI"] = args.mongo_uri
+
+# -----------------------------------------------------------------------------
+# Stand-ins
+# -----------------------------------------------------------------------------
+MONGOMOCK_METHODS = ("find_one", "find_one_and_update", "insert_one", "insert_many", "update_one", "delete_one", "count_documents", "bulk_write")
+
+@contextlib.contextmanager
+def mongo_latency(seconds: float, blocking: bool = False):
+    """
+    Add a round-trip delay to the in-memory Mongo stand-in.
+
+    With `blocking`, the delay holds the event loop the way a synchronous pymongo call inside an
+    `async def` handler did; otherwise it is awaited, like a Motor round-trip. Yields a dict whose
+    "calls" entry counts the round-trips made so far.
+    """
+    from mongomock_motor import AsyncMongoMockCollection
+    originals = {name: vars(AsyncMongoMockCollection).get(name) for name in MONGOMOCK_METHODS}
+    counter = {"calls": 0}
+
+    def delayed(method):
+        async def call(self, *args, **kwargs):
+            counter["calls"] += 1
+            if blocking: time.sleep(seconds)
+            else: await asyncio.sleep(seconds)
+            return await method(self, *args, **kwargs)
+        return call
+
+    for name in MONGOMOCK_METHODS: setattr(AsyncMongoMockCollection, name, delayed(getattr(AsyncMongoMockCollection, name)))
+    try: yield counter
+    finally:
+        for name, original in originals.items():
+            if original is None: delattr(AsyncMongoMockCollection, name)
+            else: setattr(AsyncMongoMockCollection, name, original)
+
+def add_probe_routes(app):
+    """Mount GET routes that only run an auth dependency, so its cost is timed without a handler's own work."""
+    from fastapi import Depends, Request
+    from fastapi.responses import HTMLResponse
+    from api.docs import render_docs_page
+    from api.auth import get_current_principal, get_current_user
+
+    async def probe(): return {"ok": True}
+    app.add_api_route("/bench/user", probe, methods=["GET"], dependencies=[Depends(get_current_user)])
+    app.add_api_route("/bench/principal", probe, methods=["GET"], dependencies=[Depends(get_current_principal)])
+
+    # /custom-docs as it was served before caching: rendered on every request, uncompressed
+    async def docs_uncached(request: Request): return HTMLResponse(render_docs_page(request.app))
+    app.add_api_route("/bench/docs-uncached", docs_uncached, methods=["GET"])
+
+# -----------------------------------------------------------------------------
+# Measurement
+# -----------------------------------------------------------------------------
+def _rss_mb() -> float:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        # Peak rather than current RSS; ru_maxrss is in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values: return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+async def _measure(
+    make_request: Callable[[int], Awaitable], total: Optional[int], concurrency: int, stop: Optional[asyncio.Event] = None, interval: float = 0.0
+) -> dict:
+    """
+    Time `total` requests, or with `total=None` keep sending until `stop` is set.
+
+    `interval` pauses each worker between requests and times each one from when it was due. In-process
+    requests can complete without ever yielding to the event loop, so a background probe needs it to let
+    the measured load run at all.
+    """
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    wire_bytes = 0
+    indexes = iter(range(total)) if total is not None else itertools.count()
+
+    async def worker():
+        nonlocal wire_bytes
+        for i in indexes:
+            # A paced request is due once `interval` has passed, so a stalled event loop counts against it
+            due = time.perf_counter() + interval
+            if interval: await asyncio.sleep(interval)
+            if stop is not None and stop.is_set(): break
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - due)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            wire_bytes += response.num_bytes_downloaded
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    latencies.sort()
+    total = len(latencies)
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "rps": total / wall if wall else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "cpu_seconds": cpu,
+        "rss_mb": _rss_mb(),
+        "bytes_per_request": wire_bytes / total if total else 0.0,
+        "statuses": statuses,
+    }
+
+# -----------------------------------------------------------------------------
+# Scenarios
+# -----------------------------------------------------------------------------
+class Scenarios:
+    def __init__(self, client, total: int, concurrency: int, mongo_latency_ms: Optional[float] = None):
+        self.client = client
+        self.total = total
+        self.concurrency = concurrency
+        self.mongo_latency_ms = mongo_latency_ms
+        self.run_id = uuid.uuid4().hex[:8]
+        self._counter = 0
+
+    def _new_user(self) -> dict:
+        self._counter += 1
+        username = f"b{self.run_id}{self._counter}"
+        return {
+            "username": username,
+            "password": "bench-password",
+            "name": "Bench User",
+            "email": f"{username}@example.com",
+            "phone_number": f"{int(self.run_id, 16) % 10**5:05d}{self._counter:05d}",
+        }
+
+    async def _gather_limited(self, coroutines: List[Awaitable]) -> list:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async def run(coroutine):
+            async with semaphore: return await coroutine
+        return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+    async def _registered_users(self, count: int) -> List[dict]:
+        users = [self._new_user() for _ in range(count)]
+        await self._gather_limited([self.client.post("/auth/register", json=user) for user in users])
+        return users
+
+    async def _tokens(self, users: List[dict]) -> List[str]:
+        responses = await self._gather_limited([
+            self.client.post("/auth/login", json={"username": user["username"], "password": user["password"]}) for user in users
+        ])
+        return [response.json()["access_token"] for response in responses]
+
+    async def setup(self, route: str) -> Callable[[int], Awaitable]:
+        """Untimed preparation for `route`; returns the request factory to time."""
+        client = self.client
+        if route == "root":
+            return lambda i: client.get("/")
+        if route == "ping":
+            return lambda i: client.get("/ping", params={"t": time.time() * 1000})
+        if route == "custom-docs":
+            return lambda i: client.get("/custom-docs/", headers={"Accept-Encoding": "gzip, br"})
+        if route == "register":
+            users = [self._new_user() for _ in range(self.total)]
+            return lambda i: client.post("/auth/register", json=users[i])
+        if route == "login":
+            users = await self._registered_users(min(self.total, 50))
+            return lambda i: client.post("/auth/login", json={"username": users[i % len(users)]["username"], "password": users[i % len(users)]["password"]})
+        if route == "update":
+            tokens = await self._tokens(await self._registered_users(min(self.total, 50)))
+            return lambda i: client.put("/auth/update", json={"name": f"Bench {i}"}, headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+        if route == "delete":
+            tokens = await self._tokens(await self._registered_users(self.total))
+            return lambda i: client.delete("/auth/delete", headers={"Authorization": f"Bearer {tokens[i]}"})
+        raise ValueError(f"Unknown route '{route}', expected one of {ROUTES}")
+
+    async def scenario(self, name: str) -> Dict[str, dict]:
+        """Run scenario `name`; returns one `_measure` summary (plus extra counters) per variant."""
+        if name not in SCENARIOS: raise ValueError(f"Unknown scenario '{name}', expected one of {SCENARIOS}")
+        return await getattr(self, f"scenario_{name.replace('-', '_')}")()
+
+    async def _alongside(self, foreground: Awaitable, background: Callable[[int], Awaitable], concurrency: int = 1, interval: float = 0.01) -> tuple:
+        """Await `foreground` (a `_measure` run) while `background` requests keep going; returns both summaries."""
+        stop = asyncio.Event()
+        task = asyncio.create_task(_measure(background, None, concurrency, stop, interval))
+        try: result = await foreground
+        finally: stop.set()
+        return result, await task
+
+    async def scenario_async_mongo(self) -> Dict[str, dict]:
+        """Login and an authenticated route with Mongo round-trips blocking the event loop (old sync client) vs awaited."""
+        login = await self.setup("login")
+        update = await self.setup("update")
+        if self.mongo_latency_ms is None:
+            # A real server has its own latency and only the awaited client is left to measure
+            return {"login": await _measure(login, self.total, self.concurrency), "update": await _measure(update, self.total, self.concurrency)}
+
+        results = {}
+        for mode in ("blocking", "async"):
+            with mongo_latency(self.mongo_latency_ms / 1000, blocking=mode == "blocking"):
+                results[f"login-{mode}"] = await _measure(login, self.total, self.concurrency)
+                results[f"update-{mode}"] = await _measure(update, self.total, self.concurrency)
+        return results
+
+    async def scenario_login_load(self) -> Dict[str, dict]:
+        """Login throughput and /ping latency under concurrent logins, Argon2 inline on the event loop vs on the hash pool."""
+        from api import auth
+
+        async def inline(fn, *args): return fn(*args)
+
+        login = await self.setup("login")
+        results = {"ping-idle": await _measure(await self.setup("ping"), self.total, 1, interval=0.01)}
+        for mode in ("inline", "pool"):
+            rejected = auth.hasher_stats()["rejected"]
+            run_hasher = auth._run_hasher
+            if mode == "inline": auth._run_hasher = inline
+            try: results[f"login-{mode}"], results[f"ping-{mode}"] = await self._alongside(_measure(login, self.total, self.concurrency), await self.setup("ping"))
+            finally: auth._run_hasher = run_hasher
+            results[f"login-{mode}"]["argon2_rejected"] = auth.hasher_stats()["rejected"] - rejected
+        return results
+
+    @contextlib.contextmanager
+    def _awaited_mongo_latency(self):
+        if self.mongo_latency_ms is None: yield {}
+        else:
+            with mongo_latency(self.mongo_latency_ms / 1000) as counter: yield counter
+
+    async def _probe(self, path: str) -> Callable[[int], Awaitable]:
+        tokens = await self._tokens(await self._registered_users(min(self.total, 50)))
+        return lambda i: self.client.get(path, headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+
+    async def scenario_user_cache(self) -> Dict[str, dict]:
+        """An authenticated route (get_current_user) with the user cache disabled vs enabled."""
+        from api.cache import user_cache
+
+        probe = await self._probe("/bench/user")
+        enabled, results = user_cache.enabled, {}
+        try:
+            for mode in ("off", "on"):
+                user_cache.enabled = mode == "on"
+                before = user_cache.stats()
+                with self._awaited_mongo_latency(): results[f"cache-{mode}"] = await _measure(probe, self.total, self.concurrency)
+                after = user_cache.stats()
+                results[f"cache-{mode}"].update({name: after[name] - before[name] for name in ("hits", "misses")})
+        finally: user_cache.enabled = enabled
+        return results
+
+    async def scenario_claims_only(self) -> Dict[str, dict]:
+        """The claims-only principal vs get_current_user, uncached (one Mongo read per request) and cached."""
+        from api.cache import user_cache
+
+        user, principal = await self._probe("/bench/user"), await self._probe("/bench/principal")
+        enabled, results = user_cache.enabled, {}
+        try:
+            with self._awaited_mongo_latency() as mongo:
+                for variant, probe in (("user-cache-off", user), ("user-cache-on", user), ("principal", principal)):
+                    user_cache.enabled = variant == "user-cache-on"
+                    calls = mongo.get("calls", 0)
+                    results[variant] = await _measure(probe, self.total, self.concurrency)
+                    if mongo: results[variant]["mongo_calls"] = mongo["calls"] - calls
+        finally: user_cache.enabled = enabled
+        return results
+
+    async def scenario_refresh(self) -> Dict[str, dict]:
+        """Steady-state token renewal: /auth/refresh (rotating each user's refresh token) vs logging in again."""
+        users = await self._registered_users(min(self.total, 50))
+        responses = await self._gather_limited([
+            self.client.post("/auth/login", json={"username": user["username"], "password": user["password"]}) for user in users
+        ])
+        refresh_tokens = [response.json()["refresh_token"] for response in responses]
+
+        async def refresh(i):
+            # Request i and i + len(users) never overlap while concurrency < len(users), so no rotation is replayed
+            response = await self.client.post("/auth/refresh", json={"refresh_token": refresh_tokens[i % len(users)]})
+            if response.status_code == 200: refresh_tokens[i % len(users)] = response.json()["refresh_token"]
+            return response
+
+        login = lambda i: self.client.post("/auth/login", json={"username": users[i % len(users)]["username"], "password": users[i % len(users)]["password"]})
+        results = {"login": await _measure(login, self.total, self.concurrency), "refresh": await _measure(refresh, self.total, self.concurrency)}
+        for summary in results.values(): summary["cpu_ms_per_request"] = summary["cpu_seconds"] / summary["requests"] * 1000
+        return results
+
+    async def scenario_docs(self) -> Dict[str, dict]:
+        """/custom-docs latency and bytes on the wire: rendered per request vs the cached page per encoding, and a 304 revalidation."""
+        from api.compression import brotli
+
+        client = self.client
+        variants = {"rendered": lambda i: client.get("/bench/docs-uncached", headers={"Accept-Encoding": "identity"})}
+        for encoding in ["identity", "gzip"] + (["br"] if brotli is not None else []):
+            variants[f"cached-{encoding}"] = lambda i, encoding=encoding: client.get("/custom-docs/", headers={"Accept-Encoding": encoding})
+        etag = (await client.get("/custom-docs/", headers={"Accept-Encoding": "gzip"})).headers["ETag"]
+        variants["not-modified"] = lambda i: client.get("/custom-docs/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+        results = {}
+        for name, make_request in variants.items():
+            await _measure(make_request, min(20, self.total), self.concurrency)
+            results[name] = await _measure(make_request, self.total, self.concurrency)
+        return results
+
+    async def scenario_login_attack(self) -> Dict[str, dict]:
+        """
+        Legitimate logins (one per user, each from its own address, every 200 ms) alone, then during a
+        wrong-password flood from four addresses, with the auth rate limits off and at their defaults.
+        """
+        from api import ratelimit
+
+        client = self.client
+        users = await self._registered_users(min(self.total, 20) + 1)
+        victim, users = users[0], users[1:]
+        legit = lambda i: client.post(
+            "/auth/login", json={"username": users[i]["username"], "password": users[i]["password"]}, headers={"X-Forwarded-For": f"192.0.2.{i}"}
+        )
+        attack = lambda i: client.post(
+            "/auth/login", json={"username": victim["username"], "password": "wrong-password"}, headers={"X-Forwarded-For": f"198.51.100.{i % 4}"}
+        )
+
+        async def legit_logins(): return await _measure(legit, len(users), 1, interval=0.2)
+
+        saved = {name: getattr(ratelimit, name) for name in ("buckets", "AUTH_IP_RATE", "AUTH_IP_BURST", "AUTH_USER_RATE", "AUTH_USER_BURST", "RATE_LIMIT_TRUST_FORWARDED")}
+        results = {}
+        try:
+            ratelimit.RATE_LIMIT_TRUST_FORWARDED = True
+            results["legit-idle"] = await legit_logins()
+            results["legit-unlimited"], results["attack-unlimited"] = await self._alongside(legit_logins(), attack, self.concurrency, interval=0.001)
+
+            # The defaults from api/ratelimit.py, on fresh buckets so the earlier variants do not count
+            ratelimit.buckets = ratelimit.LocalTokenBuckets()
+            ratelimit.AUTH_IP_RATE, ratelimit.AUTH_IP_BURST, ratelimit.AUTH_USER_RATE, ratelimit.AUTH_USER_BURST = 1.0, 20.0, 0.2, 5.0
+            results["legit-limited"], results["attack-limited"] = await self._alongside(legit_logins(), attack, self.concurrency, interval=0.001)
+        finally:
+            for name, value in saved.items(): setattr(ratelimit, name, value)
+        return results
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+def _print_summary(label: str, summary: dict):
+    print(f"{label:<28} {summary['rps']:>9.1f} req/s  p50 {summary['p50_ms']:>8.2f} ms  p95 {summary['p95_ms']:>8.2f} ms  p99 {summary['p99_ms']:>8.2f} ms  cpu {summary['cpu_seconds']:>6.2f} s  {summary['statuses']}")
+
+def _summaries(results: dict):
+    """Yield (label, summary) for every timed route and scenario variant."""
+    yield from results.get("routes", {}).items()
+    for name, variants in results.get("scenarios", {}).items():
+        for variant, summary in variants.items(): yield f"{name}/{variant}", summary
+
+async def run(args) -> dict:
+    import httpx
+    import database
+
+    if not args.mongo_uri:
+        from mongomock_motor import AsyncMongoMockClient
+        database._client = AsyncMongoMockClient()  # connect() keeps an existing client
+
+    from server import app
+    add_probe_routes(app)
+
+    results = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mongo": "external" if args.mongo_uri else "mongomock",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mongo_latency_ms": None if args.mongo_uri else args.mongo_latency_ms,
+        },
+        "routes": {},
+        "scenarios": {},
+    }
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            scenarios = Scenarios(client, args.requests, args.concurrency, None if args.mongo_uri else args.mongo_latency_ms)
+            for route in args.routes:
+                make_request = await scenarios.setup(route)
+                if route in ("root", "ping", "custom-docs"):
+                    await _measure(make_request, min(args.warmup, args.requests), args.concurrency)
+                results["routes"][route] = await _measure(make_request, args.requests, args.concurrency)
+                _print_summary(route, results["routes"][route])
+            for name in args.scenarios:
+                results["scenarios"][name] = await scenarios.scenario(name)
+                for variant, summary in results["scenarios"][name].items(): _print_summary(f"{name}/{variant}", summary)
+        # Without operationTime (standalone mongod, mongomock) the index polls the revocations log instead
+        from api.auth import revocation_index
+        results["meta"]["revocation_sync"] = "polling" if revocation_index._start_at is None else "change stream"
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Return a line for every route or scenario variant whose throughput dropped or p95 latency grew by more than `tolerance`."""
+    regressions = []
+    previous_summaries = dict(_summaries(baseline))
+    for route, current in _summaries(results):
+        previous = previous_summaries.get(route)
+        if not previous: continue
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{route}: rps {previous['rps']:.1f} -> {current['rps']:.1f}")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {previous['p95_ms']:.2f} ms -> {current['p95_ms']:.2f} ms")
+    return regressions
+
+def _names(choices: List[str]) -> Callable[[str], List[str]]:
+    def parse(value: str) -> List[str]:
+        if value == "all": return list(choices)
+        names = [name for name in value.split(",") if name]
+        unknown = [name for name in names if name not in choices]
+        if unknown: raise argparse.ArgumentTypeError(f"unknown {', '.join(unknown)}, expected a subset of {','.join(choices)}")
+        return names
+    return parse
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Resume Assist API in-process.")
+    parser.add_argument("--routes", type=_names(ROUTES), default=ROUTES, help=f"comma separated subset of {','.join(ROUTES)}")
+    parser.add_argument("--scenarios", type=_names(SCENARIOS), default=[], help=f"comma separated subset of {','.join(SCENARIOS)}, or 'all'")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests before read-only routes")
+    parser.add_argument("--mongo-uri", default=None, help="use a real MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--mongo-latency-ms", type=float, default=2.0, help="round-trip delay added to the in-memory Mongo in scenarios that compare access paths")
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--baseline", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression before failing")
+    args = parser.parse_args(argv)
+
+    _configure_env(args)
+    results = asyncio.run(run(args))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions: print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
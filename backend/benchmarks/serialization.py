@@ -0,0 +1,66 @@
+"""
+Serialization micro-benchmarks: stdlib JSONResponse vs the pydantic-core `trusted_json_response` rendering,
+validated vs constructed response models, and gzip/brotli cost and size at typical payload sizes.
+
+    cd backend
+    python -m benchmarks.serialization --iterations 2000
+"""
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+import argparse
+import gzip
+import random
+import sys
+import timeit
+
+def _user_doc(i: int) -> dict:
+    return {
+        "_id": f"{i:024x}",
+        "username": f"user{i}",
+        "name": "Bench User",
+        "email": f"user{i}@example.com",
+        "phone_number": f"{i:010d}",
+        "created_at": datetime.now(timezone.utc),
+    }
+
+def _grading_report(resumes: int) -> dict:
+    rng = random.Random(0)
+    return {"results": [[
+        {"resume": f"data/resume_{i}.pdf", "score": rng.random(), "sections": {"experience": rng.random(), "skills": rng.random()}}
+        for i in range(resumes)
+    ]]}
+
+def _bench(label: str, fn: Callable[[], object], iterations: int):
+    seconds = min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations
+    print(f"{label:<48} {seconds * 1e6:>10.2f} us/op")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serialization and compression micro-benchmarks.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from api import trusted_json_response
+    from api.auth import UserPublic, user_doc_to_public, _public_fields
+
+    doc = _user_doc(1)
+    _bench("UserPublic(**fields) (validated)", lambda: UserPublic(**_public_fields(doc)), args.iterations)
+    _bench("user_doc_to_public (constructed)", lambda: user_doc_to_public(doc), args.iterations)
+
+    for label, payload in (("user", _public_fields(doc)), ("grading report x1000", _grading_report(1000))):
+        iterations = args.iterations if label == "user" else max(1, args.iterations // 100)
+        _bench(f"JSONResponse + jsonable_encoder ({label})", lambda: JSONResponse(jsonable_encoder(payload)).body, iterations)
+        _bench(f"trusted_json_response ({label})", lambda: trusted_json_response(payload).body, iterations)
+
+    body = trusted_json_response(_grading_report(1000)).body
+    _bench(f"gzip level 6 ({len(body)} B -> {len(gzip.compress(body, 6))} B)", lambda: gzip.compress(body, 6), max(1, args.iterations // 100))
+    try:
+        import brotli
+        _bench(f"brotli q4 ({len(body)} B -> {len(brotli.compress(body, quality=4))} B)", lambda: brotli.compress(body, quality=4), max(1, args.iterations // 100))
+    except ImportError:
+        print("brotli not installed, skipping")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
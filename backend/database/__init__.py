@@ -1,98 +1,251 @@
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DeleteMany, DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
 import os
-from typing import Any, Dict, List, Optional, Union
+from utils.metrics import mongo_command_timer
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+DB_NAME = os.getenv("MONGODB_DB", "resume_assist")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "20000"))
+
+# -----------------------------------------------------------------------------
+# Shared Client
+# -----------------------------------------------------------------------------
+# One pooled client per process, opened and closed by the FastAPI lifespan in server.py.
+_client: Optional[AsyncIOMotorClient] = None
+
+async def connect() -> AsyncIOMotorClient:
+    """Create the shared client and make sure the server answers before the app starts serving."""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            event_listeners=[mongo_command_timer],
+        )
+        await _client.admin.command("ping")
+    return _client
+
+def close():
+    """Close the shared client and its pool."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+def get_client() -> AsyncIOMotorClient:
+    if _client is None: raise RuntimeError("Mongo client is not connected, call database.connect() first")
+    return _client
+
+def get_db() -> AsyncIOMotorDatabase:
+    """FastAPI dependency returning the application database on the shared client."""
+    return get_client()[DB_NAME]
+
+WriteOp = Union[InsertOne, UpdateOne, UpdateMany, ReplaceOne, DeleteOne, DeleteMany]
+
+async def _aiter(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items: yield item
+    else:
+        for item in items: yield item
 
 # Unused so far, but will be useful later for the AI based features
 class Database:
-    def __init__(self, collection_name: str):
+    def __init__(self, collection_name: str, db: Optional[AsyncIOMotorDatabase] = None):
         """
         Initialize Database class for a specific collection.
 
+        All operations are coroutines backed by Motor, so they never block the event loop.
+        Every instance shares the process-wide client, so creating many of them opens no extra connections.
+
         Args:
             collection_name (str): The name of the MongoDB collection to operate on.
+            db (AsyncIOMotorDatabase, optional): Database to use instead of the shared one, e.g. from `Depends(get_db)`.
         """
-        mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-        db_name = os.getenv("MONGODB_DB", "resume_assist")
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client[db_name]
+        self.db = db if db is not None else get_db()
+        self.client = self.db.client
         self.collection = self.db[collection_name]
 
     # ------------------- Insert Operations -------------------
 
-    def insert(self, document: Dict[str, Any]) -> str:
+    async def insert(self, document: Dict[str, Any]) -> str:
         """Insert a single document and return its ID."""
-        result = self.collection.insert_one(document)
+        result = await self.collection.insert_one(document)
         return str(result.inserted_id)
 
-    def insert_many(self, documents: List[Dict[str, Any]]) -> List[str]:
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> List[str]:
         """Insert multiple documents and return their IDs."""
-        result = self.collection.insert_many(documents)
+        result = await self.collection.insert_many(documents)
         return [str(id) for id in result.inserted_ids]
 
     # ------------------- Find Operations -------------------
 
-    def find_one(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def find_one(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """Find a single document matching the query."""
-        return self.collection.find_one(query)
+        return await self.collection.find_one(query, projection)
 
-    def find_by_id(self, doc_id: Union[str, ObjectId]) -> Optional[Dict[str, Any]]:
+    async def find_by_id(self, doc_id: Union[str, ObjectId], projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """Find a document by its ObjectId."""
         if isinstance(doc_id, str):
             doc_id = ObjectId(doc_id)
-        return self.collection.find_one({"_id": doc_id})
+        return await self.collection.find_one({"_id": doc_id}, projection)
+
+    async def find_all(self, query: Dict[str, Any] = None, projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Find all documents matching the query. Prefer `iter_find` or `find_page` on large collections."""
+        return await self.collection.find(query or {}, projection).to_list(length=None)
+
+    async def iter_find(self, query: Dict[str, Any] = None, projection: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """Stream documents matching the query, fetching `batch_size` documents per round-trip."""
+        async for document in self.collection.find(query or {}, projection, batch_size=batch_size):
+            yield document
+
+    async def find_page(
+        self,
+        query: Dict[str, Any] = None,
+        after: Optional[Union[str, ObjectId]] = None,
+        limit: int = 100,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Keyset pagination on `_id`.
+
+        Returns the page and the cursor to pass as `after` for the next one (None on the last page).
+        Unlike skip/limit, every page costs the same no matter how deep it is.
+        """
+        query = query or {}
+        if after is not None:
+            if isinstance(after, str):
+                after = ObjectId(after)
+            query = {"$and": [query, {"_id": {"$gt": after}}]}
 
-    def find_all(self, query: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Find all documents matching the query."""
-        return list(self.collection.find(query or {}))
+        documents = await self.collection.find(query, projection).sort("_id", ASCENDING).limit(limit).to_list(length=limit)
+        next_cursor = str(documents[-1]["_id"]) if len(documents) == limit else None
+        return documents, next_cursor
 
     # ------------------- Update Operations -------------------
 
-    def update_one(self, query: Dict[str, Any], update_data: Dict[str, Any]) -> int:
+    async def update_one(self, query: Dict[str, Any], update_data: Dict[str, Any]) -> int:
         """Update a single document and return modified count."""
-        result = self.collection.update_one(query, {"$set": update_data})
+        result = await self.collection.update_one(query, {"$set": update_data})
         return result.modified_count
 
-    def update_by_id(self, doc_id: Union[str, ObjectId], update_data: Dict[str, Any]) -> int:
+    async def update_by_id(self, doc_id: Union[str, ObjectId], update_data: Dict[str, Any]) -> int:
         """Update a document by its ID."""
         if isinstance(doc_id, str):
             doc_id = ObjectId(doc_id)
-        result = self.collection.update_one({"_id": doc_id}, {"$set": update_data})
+        result = await self.collection.update_one({"_id": doc_id}, {"$set": update_data})
         return result.modified_count
 
+    async def find_one_and_update(
+        self, query: Dict[str, Any], update: Dict[str, Any], sort: Optional[List[Tuple[str, int]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically apply `update` (raw update operators, e.g. {"$set": ..., "$inc": ...}) to the first document
+        matching the query, in `sort` order, and return the updated document.
+        """
+        return await self.collection.find_one_and_update(query, update, sort=sort, return_document=ReturnDocument.AFTER)
+
     # ------------------- Delete Operations -------------------
 
-    def delete_one(self, query: Dict[str, Any]) -> int:
+    async def delete_one(self, query: Dict[str, Any]) -> int:
         """Delete a single document matching the query."""
-        result = self.collection.delete_one(query)
+        result = await self.collection.delete_one(query)
         return result.deleted_count
 
-    def delete_by_id(self, doc_id: Union[str, ObjectId]) -> int:
+    async def delete_by_id(self, doc_id: Union[str, ObjectId]) -> int:
         """Delete a document by its ObjectId."""
         if isinstance(doc_id, str):
             doc_id = ObjectId(doc_id)
-        result = self.collection.delete_one({"_id": doc_id})
+        result = await self.collection.delete_one({"_id": doc_id})
         return result.deleted_count
 
-    def delete_many(self, query: Dict[str, Any]) -> int:
+    async def delete_many(self, query: Dict[str, Any]) -> int:
         """Delete multiple documents matching the query."""
-        result = self.collection.delete_many(query)
+        result = await self.collection.delete_many(query)
         return result.deleted_count
 
+    # ------------------- Bulk Operations -------------------
+
+    async def bulk_write(
+        self,
+        operations: Union[Iterable[WriteOp], AsyncIterable[WriteOp]],
+        batch_size: int = 1000,
+        ordered: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Run mixed write operations (pymongo `InsertOne`, `UpdateOne`, `UpdateMany`, `ReplaceOne`, `DeleteOne`,
+        `DeleteMany`, upserts via `upsert=True`) in batches of `batch_size` per round-trip.
+
+        `operations` may be a list or a (async) generator. Operations are pulled one batch at a time and the next
+        batch is only read once the previous one is written, so a streaming producer is naturally throttled to
+        the database's pace and memory stays bounded by `batch_size`.
+
+        With `ordered=True` the first failing operation stops the whole run. With `ordered=False` each batch is
+        sent unordered and failures are collected while the rest keep going.
+
+        Returns totals, `upserted_ids` and `errors` keyed by each operation's position in the input, and
+        `processed`, the number of operations that were sent.
+        """
+        summary = {
+            "processed": 0, "inserted": 0, "matched": 0, "modified": 0, "deleted": 0, "upserted": 0,
+            "upserted_ids": {}, "errors": [],
+        }
+
+        def record(result: Dict[str, Any], offset: int):
+            summary["inserted"] += result.get("nInserted", 0)
+            summary["matched"] += result.get("nMatched", 0)
+            summary["modified"] += result.get("nModified", 0)
+            summary["deleted"] += result.get("nRemoved", 0)
+            summary["upserted"] += result.get("nUpserted", 0)
+            for upsert in result.get("upserted", []):
+                summary["upserted_ids"][offset + upsert["index"]] = str(upsert["_id"])
+            for error in result.get("writeErrors", []):
+                summary["errors"].append({"index": offset + error["index"], "code": error.get("code"), "message": error.get("errmsg")})
+
+        async def flush(batch: List[WriteOp]) -> bool:
+            offset = summary["processed"]
+            summary["processed"] += len(batch)
+            try:
+                result = await self.collection.bulk_write(batch, ordered=ordered)
+                record(result.bulk_api_result, offset)
+            except BulkWriteError as err:
+                record(err.details, offset)
+                return not ordered
+            return True
+
+        batch: List[WriteOp] = []
+        async for operation in _aiter(operations):
+            batch.append(operation)
+            if len(batch) >= batch_size:
+                if not await flush(batch): return summary
+                batch = []
+        if batch: await flush(batch)
+        return summary
+
     # ------------------- Utility Methods -------------------
 
-    def count(self, query: Dict[str, Any] = None) -> int:
+    async def count(self, query: Dict[str, Any] = None) -> int:
         """Count documents matching the query."""
-        return self.collection.count_documents(query or {})
+        return await self.collection.count_documents(query or {})
 
-    def drop_collection(self):
+    async def drop_collection(self):
         """Drop the entire collection."""
-        self.collection.drop()
+        await self.collection.drop()
 
-    def list_collections(self) -> List[str]:
+    async def list_collections(self) -> List[str]:
         """List all collections in the database."""
-        return self.db.list_collection_names()
+        return await self.db.list_collection_names()
 
-    def exists(self, query: Dict[str, Any]) -> bool:
-        """Check if a document exists for the given query."""
-        return self.collection.find_one(query) is not None
+    async def exists(self, query: Dict[str, Any]) -> bool:
+        """Check if a document exists for the given query, without fetching its fields."""
+        return await self.collection.find_one(query, {"_id": 1}) is not None
@@ -0,0 +1,155 @@
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import heapq
+import math
+import os
+import pickle
+import re
+
+# Keeps skill tokens like "c++", "c#" and "node.js" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+# The log is folded into the snapshot once it is larger than both the snapshot and this
+COMPACT_MIN_BYTES = 1 << 20
+
+def tokenize(text: str) -> List[str]:
+    return [token.rstrip(".") for token in TOKEN_PATTERN.findall(text.lower())]
+
+class BM25Index:
+    """
+    Incremental inverted index with Okapi BM25 scoring, keyed by the same chunk ids as the Chroma collection.
+
+    Chunk texts and metadata are kept alongside the postings so lexical-only lookups never touch Chroma
+    or the embedding model.
+
+    Persisted as a snapshot at `path` plus an append-only log of the adds and removes made since. `save()`
+    only appends what changed; once the log outgrows the snapshot it is folded into a new snapshot, so the
+    bytes written stay proportional to the bytes indexed.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.documents: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self.total_length = 0
+        self._unsaved: List[tuple] = []
+        self._snapshot_bytes = self._log_bytes = 0
+
+    def __len__(self) -> int: return len(self.doc_lengths)
+
+    # ------------------- Updates -------------------
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]):
+        """Index chunks, replacing any already indexed under the same id."""
+        self._unsaved.append(("add", list(ids), list(texts), [metadata or {} for metadata in metadatas]))
+        self._apply_add(ids, texts, metadatas)
+
+    def remove(self, ids: List[str]):
+        self._unsaved.append(("remove", list(ids)))
+        self._apply_remove(ids)
+
+    def clear(self):
+        self._unsaved.append(("clear",))
+        self._apply_clear()
+
+    def _apply_add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]):
+        self._apply_remove([chunk_id for chunk_id in ids if chunk_id in self.doc_lengths])
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            tokens = tokenize(text)
+            for term, tf in Counter(tokens).items():
+                self.postings[term][chunk_id] = tf
+            self.doc_lengths[chunk_id] = len(tokens)
+            self.total_length += len(tokens)
+            self.documents[chunk_id] = (text, metadata or {})
+
+    def _apply_remove(self, ids: List[str]):
+        for chunk_id in ids:
+            if chunk_id not in self.doc_lengths: continue
+            text, _ = self.documents.pop(chunk_id)
+            for term in set(tokenize(text)):
+                postings = self.postings.get(term)
+                if postings is None: continue
+                postings.pop(chunk_id, None)
+                if not postings: del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(chunk_id)
+
+    def _apply_clear(self):
+        self.postings.clear()
+        self.doc_lengths.clear()
+        self.documents.clear()
+        self.total_length = 0
+
+    # ------------------- Search -------------------
+
+    def search(self, query_text: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Return up to top_k (chunk id, BM25 score) pairs, best first."""
+        if not self.doc_lengths: return []
+        n_docs = len(self.doc_lengths)
+        avg_length = self.total_length / n_docs
+
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query_text)):
+            postings = self.postings.get(term)
+            if not postings: continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    # ------------------- Persistence -------------------
+
+    @property
+    def log_path(self) -> str: return self.path + ".log"
+
+    def save(self):
+        """Persist the changes made since the last save."""
+        if not self.path or not self._unsaved: return
+        cleared = any(record[0] == "clear" for record in self._unsaved)
+        if cleared or self._log_bytes > max(self._snapshot_bytes, COMPACT_MIN_BYTES): return self.compact()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.log_path, "ab") as f:
+            for record in self._unsaved:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._log_bytes = f.tell()
+        self._unsaved = []
+
+    def compact(self):
+        """Write the whole index as a new snapshot and empty the log."""
+        if not self.path: return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((dict(self.postings), self.doc_lengths, self.documents, self.total_length), f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._snapshot_bytes = f.tell()
+        os.replace(tmp_path, self.path)
+        # A crash before the truncate only means replaying records the snapshot already holds, which is harmless
+        # since every record sets or deletes whole chunks
+        open(self.log_path, "wb").close()
+        self._unsaved, self._log_bytes = [], 0
+
+    def load(self) -> bool:
+        """Load the snapshot at `path` and replay its log. Returns False if there is nothing persisted yet."""
+        if not self.path or not (os.path.exists(self.path) or os.path.exists(self.log_path)): return False
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                postings, self.doc_lengths, self.documents, self.total_length = pickle.load(f)
+            self.postings = defaultdict(dict, postings)
+            self._snapshot_bytes = os.path.getsize(self.path)
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as f:
+                while True:
+                    try: record = pickle.load(f)
+                    except (EOFError, pickle.UnpicklingError, ValueError): break
+                    getattr(self, f"_apply_{record[0]}")(*record[1:])
+                    self._log_bytes = f.tell()
+            # A torn record at the end is what a crash mid-append leaves behind; cut it so later appends stay readable
+            if os.path.getsize(self.log_path) > self._log_bytes: os.truncate(self.log_path, self._log_bytes)
+        self._unsaved = []
+        return True
@@ -1,33 +1,328 @@
 from langchain.vectorstores.chroma import Chroma
-from utils import get_embedding_function, split_documents, load_documents_from_directory
+from utils import get_embedding_function, list_directory_files, iter_document_chunks, iter_file_chunks, iter_batches
 from langchain.schema import Document
-from typing import List
+from database.bm25 import BM25Index
+from utils.metrics import timed
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from collections import OrderedDict, defaultdict
+from functools import partial
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import threading
+import uuid
+import weakref
 
 CHROMA_PATH = "chroma"
+MANIFEST_FILE = "ingest_manifest.json"
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+WRITE_BATCH_SIZE = int(os.getenv("CHROMA_WRITE_BATCH_SIZE", "64"))
+WRITE_BATCH_SECONDS = float(os.getenv("CHROMA_WRITE_BATCH_SECONDS", "2"))
+QUERY_CACHE_SIZE = int(os.getenv("CHROMA_QUERY_CACHE_SIZE", "1024"))
+BM25_FILE = "bm25_index.pkl"
+GENERATION_FILE = "generation"
+RRF_K = 60
+
+# Every live store, so buffered writes can be flushed on app shutdown
+_open_stores: "weakref.WeakSet[ChromaDB]" = weakref.WeakSet()
+
+def flush_all():
+    """Flush the write buffer of every open ChromaDB. Called from the FastAPI lifespan on shutdown."""
+    for store in list(_open_stores):
+        store.flush()
 
 class ChromaDB:
-    def __init__(self):
+    def __init__(self, write_batch_size: int = WRITE_BATCH_SIZE, write_batch_seconds: float = WRITE_BATCH_SECONDS):
         self.persist_directory = CHROMA_PATH
-        self.embedding_function = get_embedding_function(model_name = "amazon.titan-embed-text-v1") # TODO: Update model once we switch to hugging face embeddings
+        self.embedding_function = get_embedding_function() # Backend and model come from EMBEDDING_BACKEND / EMBEDDING_MODEL
         self.vectorstore = Chroma(persist_directory=self.persist_directory, embedding_function=self.embedding_function)
 
+        # Write-behind buffer: documents are embedded, added and persisted once per batch
+        self.write_batch_size = write_batch_size
+        self.write_batch_seconds = write_batch_seconds
+        self._pending: List[Document] = []
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._query_cache: "OrderedDict[tuple, List[Document]]" = OrderedDict()
+        self.version = 0
+
+        # Lexical index over the same chunk ids, kept in step with every write below
+        self.bm25 = BM25Index(os.path.join(self.persist_directory, BM25_FILE))
+        if not self.bm25.load(): self._rebuild_bm25()
+        _open_stores.add(self)
+
     def add_documents(self, documents: List[Document]):
-        """Add documents to the Chroma vector store."""
-        self.vectorstore.add_documents(documents)
-        self.vectorstore.persist()
+        """
+        Queue documents for the Chroma vector store, upserting by the chunk ids from `split_documents` when present.
+
+        Documents are written once `write_batch_size` are queued or `write_batch_seconds` after the first one
+        arrived, whichever comes first. Call `flush()` to write them immediately.
+        """
+        with self._lock:
+            self._pending.extend(documents)
+            if len(self._pending) >= self.write_batch_size:
+                self.flush()
+            elif self._timer is None and self._pending:
+                self._timer = threading.Timer(self.write_batch_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Embed, add and persist every queued document in one batch."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending: return
+
+            # Later writes to the same id win; Chroma rejects duplicate ids within one add
+            batch = {doc.metadata.get("id") or str(uuid.uuid4()): doc for doc in self._pending}
+            with timed("chroma", "add"):
+                self.vectorstore.add_documents(list(batch.values()), ids=list(batch.keys()))
+            self.vectorstore.persist()
+            self.bm25.add(list(batch.keys()), [doc.page_content for doc in batch.values()], [doc.metadata for doc in batch.values()])
+            self.bm25.save()
+            self._pending = []
+            self._on_write()
+
+    # ------------------- Query Operations -------------------
+
+    def query(self, query_text: str, top_k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Query the vector store and return top_k similar documents, optionally restricted by a metadata filter."""
+        return self.query_many([query_text], top_k=top_k, filter=filter)[0]
+
+    def query_many(self, query_texts: List[str], top_k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+        """
+        Run several queries at once: uncached queries are embedded in a single batch and searched in one
+        collection call. Results are cached per (query, top_k, filter) until the store is written to or cleared.
+
+        Queries are embedded with `embed_documents`, which matches `embed_query` for the symmetric models
+        the embedding backends provide.
+        """
+        keys = [self._query_cache_key(text, top_k, filter) for text in query_texts]
+        results: Dict[tuple, List[Document]] = {}
+        with self._lock:
+            version = self.version
+            for key in keys:
+                if key in self._query_cache:
+                    self._query_cache.move_to_end(key)
+                    results[key] = self._query_cache[key]
+
+        missing = {key: text for key, text in zip(keys, query_texts) if key not in results}
+        if missing:
+            with timed("chroma", "embed"):
+                embeddings = self.embedding_function.embed_documents(list(missing.values()))
+            with timed("chroma", "search"):
+                found = self.vectorstore._collection.query(query_embeddings=embeddings, n_results=top_k, where=filter or None)
+            with self._lock:
+                # A write that landed during the search may not be reflected in it, so only cache if there was none
+                cacheable = self.version == version
+                for i, key in enumerate(missing):
+                    documents = [
+                        Document(page_content=text, metadata=metadata or {})
+                        for text, metadata in zip(found["documents"][i], found["metadatas"][i])
+                    ]
+                    results[key] = documents
+                    if cacheable: self._query_cache[key] = documents
+                while len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+
+        return [results[key] for key in keys]
+
+    async def aquery(self, query_text: str, top_k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Async `query`: embedding and search run in a worker thread so the event loop stays free."""
+        return await asyncio.get_running_loop().run_in_executor(None, partial(self.query, query_text, top_k, filter))
+
+    async def aquery_many(self, query_texts: List[str], top_k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+        """Async `query_many`."""
+        return await asyncio.get_running_loop().run_in_executor(None, partial(self.query_many, query_texts, top_k, filter))
+
+    def lexical_query(self, query_text: str, top_k: int = 5) -> List[Document]:
+        """BM25-only lookup: no embedding call and no Chroma access, for exact skill/keyword matching."""
+        with timed("chroma", "lexical_search"):
+            return [self._indexed_document(chunk_id) for chunk_id, _ in self.bm25.search(query_text, top_k)]
+
+    def hybrid_query(self, query_text: str, top_k: int = 5, lexical_weight: float = 0.5, candidates: Optional[int] = None) -> List[Document]:
+        """
+        Fuse BM25 and vector rankings with weighted reciprocal rank fusion.
+
+        Each side contributes `weight / (RRF_K + rank)` for its top `candidates` chunks (default 4 * top_k).
+        A `lexical_weight` of 1.0 is the same as `lexical_query`.
+        """
+        if lexical_weight >= 1.0: return self.lexical_query(query_text, top_k)
+        candidates = candidates or top_k * 4
+
+        fused: Dict[str, float] = defaultdict(float)
+        for rank, (chunk_id, _) in enumerate(self.bm25.search(query_text, candidates), start=1):
+            fused[chunk_id] += lexical_weight / (RRF_K + rank)
+
+        with timed("chroma", "embed"):
+            embedding = self.embedding_function.embed_query(query_text)
+        with timed("chroma", "search"):
+            found = self.vectorstore._collection.query(query_embeddings=[embedding], n_results=candidates)
+        vector_documents = {}
+        for rank, (chunk_id, text, metadata) in enumerate(zip(found["ids"][0], found["documents"][0], found["metadatas"][0]), start=1):
+            fused[chunk_id] += (1 - lexical_weight) / (RRF_K + rank)
+            vector_documents[chunk_id] = Document(page_content=text, metadata=metadata or {})
+
+        best = heapq.nlargest(top_k, fused.items(), key=lambda item: item[1])
+        return [vector_documents.get(chunk_id) or self._indexed_document(chunk_id) for chunk_id, _ in best]
+
+    def _indexed_document(self, chunk_id: str) -> Document:
+        text, metadata = self.bm25.documents[chunk_id]
+        return Document(page_content=text, metadata=metadata)
 
-    def query(self, query_text: str, top_k: int = 5) -> List[Document]:
-        """Query the vector store and return top_k similar documents."""
-        results = self.vectorstore.similarity_search(query_text, k=top_k)
-        return results
+    def iter_stored(self, include: List[str], page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the whole collection as `get` results of up to `page_size` chunks (default: Chroma's max batch
+        size). A single unbounded `get` fails on large collections, past SQLite's limit on bound variables.
+        """
+        page_size = page_size or self.vectorstore._client.get_max_batch_size()
+        offset = 0
+        while True:
+            page = self.vectorstore._collection.get(include=include, limit=page_size, offset=offset)
+            if not page["ids"]: return
+            yield page
+            offset += len(page["ids"])
+
+    def _rebuild_bm25(self):
+        """Index whatever is already in the collection, e.g. chunks added before the BM25 index existed."""
+        for stored in self.iter_stored(["documents", "metadatas"]):
+            self.bm25.add(stored["ids"], stored["documents"], stored["metadatas"])
+        if len(self.bm25): self.bm25.save()
+
+    @staticmethod
+    def _query_cache_key(query_text: str, top_k: int, filter: Optional[Dict[str, Any]]) -> tuple:
+        return (_content_hash(query_text), top_k, json.dumps(filter, sort_keys=True, default=str) if filter else None)
+
+    def _on_write(self):
+        """
+        Drop cached query results, bump `version` and persist a new generation, so consumers holding derived
+        data know to reload, whether they share this instance or run in another process.
+        """
+        with self._lock:
+            self._query_cache.clear()
+            self.version += 1
+            os.makedirs(self.persist_directory, exist_ok=True)
+            tmp_path = self.generation_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f: f.write(uuid.uuid4().hex)
+            os.replace(tmp_path, self.generation_path)
+
+    @property
+    def generation_path(self) -> str:
+        return os.path.join(self.persist_directory, GENERATION_FILE)
+
+    def generation(self) -> str:
+        """Token that changes on every write to the store by any process ("" before the first write)."""
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as f: return f.read()
+        except FileNotFoundError: return ""
 
     def clear(self):
         """Clear the entire vector store."""
+        with self._lock:
+            self._pending = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
         self.vectorstore.delete_collection()
+        self.bm25.clear()
+        self.bm25.save()
+        self._on_write()
+        if os.path.exists(self.manifest_path): os.remove(self.manifest_path)
     
-    def load_and_add_documents_from_directory(self, directory_path: str, file_types: List[str] = None):
-        """Load documents from a directory, split them, and add to the vector store."""
-        documents = load_documents_from_directory(directory_path, file_types)
-        chunks = split_documents(documents)
-        self.add_documents(chunks)
-    
\ No newline at end of file
+    def load_and_add_documents_from_directory(
+        self,
+        directory_path: str,
+        file_types: List[str] = None,
+        incremental: bool = False,
+        batch_size: int = INGEST_BATCH_SIZE,
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Load documents from a directory, split them, and add to the vector store.
+
+        Files are loaded and split across a process pool (see `utils.iter_file_chunks`) and chunks are embedded
+        and added in batches of `batch_size` as they arrive, so peak memory does not grow with the size of the corpus.
+
+        With `incremental=True`, a manifest of file mtimes and chunk content hashes is kept next to the store:
+        unchanged files are not reloaded, new or modified files go through the same process pool, only new or
+        changed chunks are embedded, and vectors belonging to deleted files or dropped chunks are removed.
+
+        `on_progress`, if given, is called with the running stats after every batch (or file, when incremental).
+        """
+        if not incremental:
+            sources, chunks_embedded = set(), 0
+            for batch in iter_batches(iter_document_chunks(directory_path, file_types), batch_size):
+                self.add_documents(batch)
+                sources.update(chunk.metadata.get("source") for chunk in batch)
+                chunks_embedded += len(batch)
+                if on_progress: on_progress({"files_loaded": len(sources), "chunks_embedded": chunks_embedded})
+            self.flush()
+            return {"files_loaded": len(sources), "chunks_embedded": chunks_embedded, "chunks_deleted": 0}
+
+        manifest = self._load_manifest()
+        stats = {"files_loaded": 0, "files_skipped": 0, "chunks_embedded": 0, "chunks_deleted": 0}
+        stale_ids: List[str] = []
+
+        seen, modified = set(), {}
+        for path in list_directory_files(directory_path, file_types):
+            source = str(path)
+            seen.add(source)
+            mtime = path.stat().st_mtime
+            entry = manifest.get(source)
+            if entry and entry["mtime"] == mtime: stats["files_skipped"] += 1
+            else: modified[source] = mtime
+
+        # Only new and modified files go through the process pool, in completion order
+        for source, chunks in iter_file_chunks(modified):
+            hashes = {chunk.metadata["id"]: _content_hash(chunk.page_content) for chunk in chunks}
+            old_hashes = manifest[source]["chunks"] if source in manifest else {}
+
+            changed = [chunk for chunk in chunks if old_hashes.get(chunk.metadata["id"]) != hashes[chunk.metadata["id"]]]
+            if changed: self.add_documents(changed)
+            stale_ids.extend(chunk_id for chunk_id in old_hashes if chunk_id not in hashes)
+
+            manifest[source] = {"mtime": modified[source], "chunks": hashes}
+            stats["files_loaded"] += 1
+            stats["chunks_embedded"] += len(changed)
+            if on_progress: on_progress(dict(stats))
+
+        for source in [source for source in manifest if source not in seen]:
+            stale_ids.extend(manifest.pop(source)["chunks"])
+
+        self.flush()
+        if stale_ids:
+            self.vectorstore.delete(ids=stale_ids)
+            self.vectorstore.persist()
+            self.bm25.remove(stale_ids)
+            self.bm25.save()
+            self._on_write()
+        stats["chunks_deleted"] = len(stale_ids)
+
+        self._save_manifest(manifest)
+        return stats
+
+    # ------------------- Ingestion Manifest -------------------
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.persist_directory, MANIFEST_FILE)
+
+    def _load_manifest(self) -> Dict[str, dict]:
+        if not os.path.exists(self.manifest_path): return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, dict]):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
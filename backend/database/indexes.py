@@ -0,0 +1,35 @@
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+from typing import Dict, List, Optional
+import re
+
+# Index names follow "<field>_unique" so a DuplicateKeyError can be traced back to the field that clashed.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("phone_number", ASCENDING)], name="phone_number_unique", unique=True),
+    ],
+    # Revocation log read by polling workers (see api.auth.RevocationIndex); entries only need to outlive a poll
+    "revocations": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=24 * 3600),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("run_after", ASCENDING)], name="status_run_after"),
+        IndexModel([("owner", ASCENDING), ("status", ASCENDING)], name="owner_status"),
+    ],
+}
+
+async def ensure_indexes(db):
+    """Create every declared index. Safe to run on each startup, existing indexes are left as they are."""
+    for collection_name, indexes in INDEXES.items():
+        await db[collection_name].create_indexes(indexes)
+
+def duplicate_key_field(err: DuplicateKeyError) -> Optional[str]:
+    """Return the field whose unique index rejected the write, if it can be determined."""
+    key_pattern = (err.details or {}).get("keyPattern")
+    if key_pattern: return next(iter(key_pattern))
+
+    # Older servers only report the index name in the error message
+    match = re.search(r"index: (\w+)_unique", str(err))
+    return match.group(1) if match else None
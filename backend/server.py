@@ -1,14 +1,51 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
+import logging
 import time
 
-from api import auth, docs
+import database
+from api import auth, docs, grading, jobs, metrics
+from api.cache import user_cache
+from api.compression import CompressionMiddleware
+from database import chroma
+from database.indexes import ensure_indexes
+from utils import embedding_backends
+
+logger = logging.getLogger(__name__)
 
 # -----------------------------------------------------------------------------
 # App Initialization
 # -----------------------------------------------------------------------------
-app = FastAPI()
+async def warm_up_embeddings():
+    # Builds the shared embedding backend once per process, so the first query does not pay for loading it
+    if not embedding_backends.EMBEDDING_WARMUP: return
+    try: await asyncio.get_running_loop().run_in_executor(None, embedding_backends.warm_up)
+    except Exception: logger.exception("Embedding warm-up failed, the backend will be built on first use")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await database.connect()
+    db = database.get_db()
+    await ensure_indexes(db)
+    await user_cache.start()
+    await auth.revocation_index.start(db[auth.USERS_COLL], db[auth.REVOCATIONS_COLL])
+    await jobs.dispatcher.start()
+    await warm_up_embeddings()
+    yield
+    await jobs.dispatcher.stop()
+    await auth.revocation_index.stop()
+    await user_cache.stop()
+    auth.hash_executor.shutdown(wait=True)
+    grading.grading_executor.shutdown(wait=True)
+    chroma.flush_all()
+    database.close()
+
+app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -18,7 +55,10 @@ app.add_middleware(
 )
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
+app.include_router(grading.router, prefix="/grading", tags=["grading"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 app.include_router(docs.router, prefix="/custom-docs", tags=["custom-docs"])
+app.include_router(metrics.router, tags=["metrics"])
 
 
 # -----------------------------------------------------------------------------
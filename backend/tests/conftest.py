@@ -0,0 +1,94 @@
+import os
+
+# Module-level config is read at import time, so these must be set before anything from the app is imported
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "0")
+os.environ.setdefault("EMBEDDING_WARMUP", "0")
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST", "8192")
+os.environ.setdefault("ARGON2_PARALLELISM", "1")
+# Every in-process request comes from the same client address
+for name in ("AUTH_IP_RATE", "AUTH_IP_BURST", "AUTH_USER_RATE", "AUTH_USER_BURST"):
+    os.environ.setdefault(name, "1e9")
+
+import uuid
+import pytest
+
+# The app's executors are module-level and shut down with the lifespan, so one app instance serves the whole session
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def mongo():
+    """In-memory Mongo installed as the shared client; database.connect() keeps an existing client."""
+    import database
+    from mongomock_motor import AsyncMongoMockClient
+
+    database._client = AsyncMongoMockClient()
+    yield database._client
+    database._client = None
+
+@pytest.fixture(scope="session")
+async def client(mongo):
+    import httpx
+    from server import app
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+@pytest.fixture
+def login_user(client):
+    """Register a fresh user and log them in, returning the token response."""
+    async def login() -> dict:
+        username = f"u{uuid.uuid4().hex[:12]}"
+        user = {
+            "username": username,
+            "password": "test-password",
+            "name": "Test User",
+            "email": f"{username}@example.com",
+            "phone_number": str(uuid.uuid4().int)[:12],
+        }
+        assert (await client.post("/auth/register", json=user)).status_code == 201
+        response = await client.post("/auth/login", json={"username": username, "password": user["password"]})
+        assert response.status_code == 200
+        return response.json()
+    return login
+
+def load_text_file(file_path: str, chunk_size: int, chunk_overlap: int):
+    """Plain-text stand-in for the unstructured loader run by the ingestion process pool."""
+    from langchain.schema import Document
+    from utils import split_documents
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        return split_documents([Document(page_content=f.read(), metadata={"source": file_path})], chunk_size, chunk_overlap)
+
+def init_job_worker(workdir: str, chroma_path: str):
+    """
+    Initializer for spawned job workers, which do not inherit the test's patches: the same setup as `workdir`,
+    with job progress written to an in-memory collection since the worker has no Mongo server to report to.
+    """
+    import mongomock
+    import utils
+    import utils.jobs
+    from database import chroma
+
+    os.chdir(workdir)
+    chroma.CHROMA_PATH = chroma_path
+    utils._load_and_split_file = load_text_file
+    jobs = mongomock.MongoClient()["test"][utils.jobs.JOBS_COLL]
+    utils.jobs._jobs_collection = lambda: jobs
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Fresh working directory for `data/` and the Chroma store, loading files as plain text."""
+    import utils
+    from database import chroma
+
+    monkeypatch.chdir(tmp_path)
+    # Chroma keeps one client per persist path for the whole process, so each test needs its own absolute path
+    monkeypatch.setattr(chroma, "CHROMA_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setattr(utils, "_load_and_split_file", load_text_file)
+    (tmp_path / utils.DATA_DIR).mkdir()
+    return tmp_path
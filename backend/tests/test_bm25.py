@@ -0,0 +1,88 @@
+import os
+from database import bm25
+from database.bm25 import BM25Index
+
+def _batch(start: int, size: int):
+    ids = [f"chunk-{i}" for i in range(start, start + size)]
+    texts = [f"resume {i} python fastapi skill{i % 7}" for i in range(start, start + size)]
+    return ids, texts, [{"source": f"r{i}.txt"} for i in range(start, start + size)]
+
+def _reloaded(path: str) -> BM25Index:
+    index = BM25Index(path)
+    assert index.load()
+    return index
+
+def test_saves_append_and_reload_to_the_same_index(tmp_path):
+    path = str(tmp_path / "bm25.pkl")
+    index = BM25Index(path)
+    index.add(*_batch(0, 10))
+    index.save()
+    index.add(*_batch(5, 10))
+    index.remove(["chunk-0", "chunk-1"])
+    index.save()
+
+    reloaded = _reloaded(path)
+    assert reloaded.documents == index.documents
+    assert reloaded.total_length == index.total_length
+    assert reloaded.search("skill3 python", 5) == index.search("skill3 python", 5)
+
+def test_bytes_written_grow_linearly(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25, "COMPACT_MIN_BYTES", 4096)
+    path = str(tmp_path / "bm25.pkl")
+    index = BM25Index(path)
+
+    written = 0
+    compact = index.compact
+    def counting_compact():
+        nonlocal written
+        compact()
+        written += os.path.getsize(path)
+    monkeypatch.setattr(index, "compact", counting_compact)
+
+    for batch in range(200):
+        log_before = os.path.getsize(index.log_path) if os.path.exists(index.log_path) else 0
+        index.add(*_batch(batch * 16, 16))
+        index.save()
+        written += max(0, os.path.getsize(index.log_path) - log_before)
+
+    # Rewriting the whole index on every save would write about 100x the final size here
+    assert written < 4 * (os.path.getsize(path) + os.path.getsize(index.log_path))
+    assert len(_reloaded(path)) == 200 * 16
+
+def test_torn_log_tail_is_dropped(tmp_path):
+    path = str(tmp_path / "bm25.pkl")
+    index = BM25Index(path)
+    index.add(*_batch(0, 4))
+    index.save()
+    with open(index.log_path, "ab") as f: f.write(b"\x80\x05\x95torn")
+
+    reloaded = _reloaded(path)
+    assert len(reloaded) == 4
+    reloaded.add(*_batch(4, 4))
+    reloaded.save()
+    assert len(_reloaded(path)) == 8
+
+def test_clear_compacts(tmp_path):
+    path = str(tmp_path / "bm25.pkl")
+    index = BM25Index(path)
+    index.add(*_batch(0, 50))
+    index.save()
+    index.clear()
+    index.save()
+
+    assert os.path.getsize(index.log_path) == 0
+    assert len(_reloaded(path)) == 0
+
+def test_store_rebuilds_the_index_page_by_page(workdir):
+    from langchain.schema import Document
+    from database.chroma import ChromaDB
+
+    store = ChromaDB()
+    store.add_documents([Document(page_content=f"resume {i} python", metadata={"id": f"c{i}", "source": f"r{i}.txt"}) for i in range(5)])
+    store.flush()
+    assert [len(page["ids"]) for page in store.iter_stored(["metadatas"], page_size=2)] == [2, 2, 1]
+
+    # As if the collection had been written before the BM25 index existed
+    for path in (store.bm25.path, store.bm25.log_path):
+        if os.path.exists(path): os.remove(path)
+    assert len(ChromaDB().bm25) == 5
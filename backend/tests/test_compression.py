@@ -0,0 +1,43 @@
+import pytest
+
+from api import compression
+from api.compression import negotiate
+
+pytestmark = pytest.mark.anyio
+
+@pytest.mark.parametrize("header, expected", [
+    ("", "identity"),
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("gzip; q=0.0, deflate", "identity"),
+    ("gzip;q=nonsense", "identity"),
+    ("*", "gzip"),
+    ("*;q=0.1", "gzip"),
+    ("*, gzip;q=0", "identity"),
+    ("deflate, identity", "identity"),
+])
+def test_negotiate_without_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate(header) == expected
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0.2, gzip;q=0.8", "gzip"),
+    ("br;q=0.8, gzip;q=0.2", "br"),
+    ("*", "br"),
+])
+def test_negotiate_with_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate(header) == expected
+
+async def test_refused_gzip_is_not_sent(client, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    refused = await client.get("/openapi.json", headers={"Accept-Encoding": "gzip;q=0"})
+    accepted = await client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in refused.headers
+    assert accepted.headers["content-encoding"] == "gzip"
+    assert accepted.json() == refused.json()
@@ -0,0 +1,74 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import monitoring
+from pymongo.errors import ServerSelectionTimeoutError
+import asyncio
+import threading
+import pytest
+
+import database
+from database import Database
+
+pytestmark = pytest.mark.anyio
+
+async def test_database_instances_share_one_client(mongo):
+    client = database.get_client()
+    instances = [Database(f"collection_{i % 5}") for i in range(200)]
+
+    assert all(instance.client is client for instance in instances)
+    await instances[0].insert({"n": 1})
+    assert database.get_client() is client
+
+async def test_connect_opens_a_single_client(monkeypatch, mongo):
+    created = []
+    def client_factory(*args, **kwargs):
+        created.append(kwargs)
+        return AsyncMongoMockClient()
+
+    monkeypatch.setattr(database, "AsyncIOMotorClient", client_factory)
+    monkeypatch.setattr(database, "_client", None)
+    for _ in range(10):
+        await database.connect()
+        Database("users")
+
+    assert len(created) == 1
+    assert created[0]["maxPoolSize"] == database.MONGO_MAX_POOL_SIZE
+
+class PoolCounter(monitoring.ConnectionPoolListener):
+    """Counts connection pools and connections opened by a client."""
+
+    def __init__(self):
+        self.pools = self.connections = 0
+
+    def pool_created(self, event): self.pools += 1
+    def connection_created(self, event): self.connections += 1
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): pass
+    def connection_checked_out(self, event): pass
+    def connection_checked_in(self, event): pass
+
+async def test_concurrent_use_keeps_one_pool_and_a_fixed_thread_count(monkeypatch):
+    # A real driver client against a closed port: operations go through pool and threads, then fail server selection
+    counter = PoolCounter()
+    client = AsyncIOMotorClient("mongodb://127.0.0.1:1", serverSelectionTimeoutMS=10, maxPoolSize=database.MONGO_MAX_POOL_SIZE, event_listeners=[counter])
+    monkeypatch.setattr(database, "_client", client)
+
+    async def use(i: int):
+        try: await Database(f"collection_{i % 5}").find_one({})
+        except ServerSelectionTimeoutError: pass
+
+    try:
+        await asyncio.gather(*(use(i) for i in range(24)))
+        threads = threading.active_count()
+        await asyncio.gather(*(use(i) for i in range(24)))
+
+        assert threading.active_count() == threads
+        assert counter.pools == 1 and counter.connections == 0
+        assert client.options.pool_options.max_pool_size == database.MONGO_MAX_POOL_SIZE
+    finally:
+        client.close()
@@ -0,0 +1,74 @@
+import multiprocessing
+import pytest
+
+import utils
+from utils import embedding_backends
+from utils.embedding_backends import HashingEmbeddings, get_embeddings, register_backend, warm_up
+
+class CountingEmbeddings(HashingEmbeddings):
+    built = 0
+
+    def __init__(self):
+        super().__init__(dimensions=16)
+        CountingEmbeddings.built += 1
+        self.queries = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+@pytest.fixture
+def counting_backend(monkeypatch):
+    monkeypatch.setattr(embedding_backends, "EMBEDDING_BACKENDS", dict(embedding_backends.EMBEDDING_BACKENDS))
+    monkeypatch.setattr(embedding_backends, "_instances", {})
+    monkeypatch.setattr(CountingEmbeddings, "built", 0)
+    register_backend("counting", default_model="counting-16")(lambda model_name: CountingEmbeddings())
+    return "counting"
+
+def test_backend_is_built_once_per_process(counting_backend):
+    functions = [utils.get_embedding_function(backend=counting_backend, cache=False) for _ in range(5)]
+
+    assert CountingEmbeddings.built == 1
+    assert all(function is functions[0] for function in functions)
+    assert get_embeddings(counting_backend)[0] is functions[0]
+
+def test_building_does_not_call_the_backend(counting_backend):
+    embeddings = utils.get_embedding_function(backend=counting_backend, cache=False)
+    assert embeddings.queries == 0
+
+    warm_up(counting_backend)
+    assert embeddings.queries == 1
+
+def test_cache_is_shared(counting_backend, monkeypatch, tmp_path):
+    monkeypatch.setattr(utils, "EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.sqlite3"))
+    monkeypatch.setattr(utils, "_embedding_caches", {})
+
+    first = utils.get_embedding_function(backend=counting_backend, cache=True)
+    first.embed_documents(["shared text"])
+    second = utils.get_embedding_function(backend=counting_backend, cache=True)
+
+    assert second is first
+    assert second.stats()["memory_size"] == 1
+
+def _embed_in_child(embeddings, connection):
+    connection.send(embeddings.embed_documents(["forked text"]))
+
+def test_batcher_works_in_a_forked_child():
+    embeddings = embedding_backends.BatchingEmbeddings(HashingEmbeddings(dimensions=16))
+    expected = embeddings.embed_documents(["forked text"])
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    child = context.Process(target=_embed_in_child, args=(embeddings, sender))
+    child.start()
+    child.join(timeout=30)
+    assert receiver.poll(0), "embedding in the forked child hung"
+    assert receiver.recv() == expected
+
+def test_forked_child_builds_its_own_instances(counting_backend):
+    parent = get_embeddings(counting_backend)[0]
+    assert embedding_backends._instances
+
+    embedding_backends._reset_after_fork()
+    assert embedding_backends._instances == {}
+    assert get_embeddings(counting_backend)[0] is not parent
@@ -0,0 +1,87 @@
+from array import array
+import pytest
+
+from utils.embedding_backends import HashingEmbeddings
+from utils.embedding_cache import CachedEmbeddings
+
+class CountingEmbeddings(HashingEmbeddings):
+    """The deterministic hashing embedder, recording every batch it is asked to embed."""
+
+    def __init__(self):
+        super().__init__(dimensions=64)
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return super().embed_documents(texts)
+
+TEXTS = ["python developer with fastapi", "data engineer, spark and airflow", "frontend engineer react"]
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "embeddings.sqlite3")
+
+def test_repeated_texts_are_served_from_memory(cache_path):
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, model_name="hashing-64", path=cache_path)
+
+    first = cache.embed_documents(TEXTS)
+    second = cache.embed_documents(TEXTS)
+
+    assert first == second
+    assert model.batches == [TEXTS]
+    assert cache.stats()["memory_hits"] == len(TEXTS)
+
+def test_misses_are_embedded_in_one_batch(cache_path):
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, model_name="hashing-64", path=cache_path)
+
+    cache.embed_documents(TEXTS[:1])
+    cache.embed_documents(TEXTS + TEXTS[1:])
+
+    assert model.batches == [TEXTS[:1], TEXTS[1:]]
+
+def test_vectors_survive_a_restart_as_float32(cache_path):
+    original = CachedEmbeddings(CountingEmbeddings(), model_name="hashing-64", path=cache_path).embed_documents(TEXTS)
+
+    model = CountingEmbeddings()
+    restarted = CachedEmbeddings(model, model_name="hashing-64", path=cache_path)
+    from_disk = restarted.embed_documents(TEXTS)
+
+    assert model.batches == []
+    assert restarted.stats()["disk_hits"] == len(TEXTS)
+    for vector, stored in zip(original, from_disk):
+        assert stored == array("f", vector).tolist()
+        assert stored == pytest.approx(vector, abs=1e-7)
+
+def test_keys_separate_models_and_queries(cache_path):
+    model = CountingEmbeddings()
+    CachedEmbeddings(model, model_name="hashing-64", path=cache_path).embed_documents(TEXTS)
+
+    other_model = CachedEmbeddings(model, model_name="other-64", path=cache_path)
+    other_model.embed_documents(TEXTS)
+    other_model.embed_query(TEXTS[0])
+
+    assert other_model.stats()["misses"] == len(TEXTS) + 1
+
+def test_hit_rate(cache_path):
+    cache = CachedEmbeddings(CountingEmbeddings(), model_name="hashing-64", path=cache_path)
+    assert cache.stats()["hit_rate"] == 0.0
+
+    for _ in range(4): cache.embed_documents(TEXTS)
+
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (3 * len(TEXTS), 0, len(TEXTS))
+    assert stats["hit_rate"] == pytest.approx(0.75)
+
+def test_stats_are_exported_on_metrics(monkeypatch, cache_path):
+    import utils
+    from api.metrics import render
+
+    monkeypatch.setattr(utils, "EMBEDDING_CACHE_PATH", cache_path)
+    monkeypatch.setattr(utils, "_embedding_caches", {})
+    utils.get_embedding_function(backend="hashing", cache=True).embed_documents(TEXTS)
+
+    exposition = render()
+    assert "embedding_cache_misses 3" in exposition
+    assert "embedding_cache_hit_rate 0.0" in exposition
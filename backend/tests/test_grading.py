@@ -0,0 +1,50 @@
+from langchain.schema import Document
+
+from database.chroma import ChromaDB
+from utils.grading import GradingEngine
+
+def _chunk(source: str, section: str, text: str) -> Document:
+    return Document(page_content=text, metadata={"source": source, "section": section, "id": f"{source}:{section}"})
+
+def test_sections_are_grouped_per_resume(workdir):
+    store = ChromaDB()
+    store.add_documents([
+        _chunk("alice.txt", "skills", "python fastapi mongodb"),
+        _chunk("alice.txt", "experience", "backend engineer building python apis"),
+        _chunk("bob.txt", "skills", "photoshop illustrator figma"),
+        _chunk("carol.txt", "skills", "python pandas numpy"),
+        _chunk("carol.txt", "education", "msc statistics"),
+        _chunk("carol.txt", "experience", "data analyst"),
+    ])
+
+    results = GradingEngine(store).grade(["python fastapi backend engineer"], top_k=3)[0]
+
+    assert results[0]["resume"] == "alice.txt"
+    assert {result["resume"]: set(result["sections"]) for result in results} == {
+        "alice.txt": {"skills", "experience"},
+        "bob.txt": {"skills"},
+        "carol.txt": {"skills", "education", "experience"},
+    }
+    for result in results:
+        assert abs(result["score"] - sum(result["sections"].values()) / len(result["sections"])) < 1e-5
+
+def test_writes_from_another_process_are_picked_up(workdir):
+    engine = GradingEngine(ChromaDB())
+    assert engine.grade(["python developer"]) == [[]]
+
+    # A separate store instance stands in for an ingestion job's process: it shares nothing in memory
+    writer = ChromaDB()
+    writer.add_documents([_chunk("dave.txt", "skills", "python developer")])
+    writer.flush()
+
+    assert [result["resume"] for result in engine.grade(["python developer"])[0]] == ["dave.txt"]
+
+def test_unchanged_store_is_not_reloaded(workdir):
+    store = ChromaDB()
+    store.add_documents([_chunk("erin.txt", "skills", "go kubernetes")])
+    engine = GradingEngine(store)
+
+    engine.grade(["kubernetes"])
+    snapshot = engine._snapshot
+    engine.grade(["go"])
+    assert engine._snapshot is snapshot
@@ -0,0 +1,28 @@
+from database.chroma import ChromaDB
+
+def _write(workdir, name: str, text: str):
+    (workdir / "data" / name).write_text(text, encoding="utf-8")
+
+def test_incremental_ingestion_only_reloads_modified_files(workdir):
+    for i in range(4): _write(workdir, f"resume_{i}.txt", f"resume {i}: python and fastapi engineer")
+    store = ChromaDB()
+
+    first = store.load_and_add_documents_from_directory("data", incremental=True)
+    assert (first["files_loaded"], first["files_skipped"], first["chunks_embedded"]) == (4, 0, 4)
+
+    _write(workdir, "resume_1.txt", "resume 1: rust and kubernetes engineer")
+    (workdir / "data" / "resume_2.txt").unlink()
+    second = store.load_and_add_documents_from_directory("data", incremental=True)
+
+    assert (second["files_loaded"], second["files_skipped"], second["chunks_embedded"], second["chunks_deleted"]) == (1, 2, 1, 1)
+    assert store.vectorstore._collection.count() == 3
+    assert store.lexical_query("kubernetes", top_k=1)[0].metadata["source"] == "data/resume_1.txt"
+
+def test_full_ingestion_reports_progress(workdir):
+    for i in range(5): _write(workdir, f"resume_{i}.txt", f"resume {i}")
+    progress = []
+
+    stats = ChromaDB().load_and_add_documents_from_directory("data", batch_size=2, on_progress=progress.append)
+
+    assert stats == {"files_loaded": 5, "chunks_embedded": 5, "chunks_deleted": 0}
+    assert [state["chunks_embedded"] for state in progress] == [2, 4, 5]
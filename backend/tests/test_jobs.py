@@ -0,0 +1,117 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import multiprocessing
+import statistics
+import time
+import pytest
+
+import utils.jobs
+from api import jobs
+from conftest import init_job_worker
+from database import Database, chroma
+
+pytestmark = pytest.mark.anyio
+
+def _headers(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+@pytest.mark.parametrize("kind, params", [
+    ("grade", {}),
+    ("grade", {"job_descriptions": []}),
+    ("grade", {"job_descriptions": ["python"], "top_k": 0}),
+    ("ingest_directory", {"directory_path": "/etc"}),
+    ("ingest_directory", {"directory_path": "data/../.."}),
+    ("ingest_directory", {"file_types": "../../etc/*"}),
+    ("ingest_directory", {"file_types": ["*.pdf", "/etc/*"]}),
+    ("ingest_directory", {"incremental": "sometimes"}),
+])
+async def test_invalid_params_are_rejected_at_enqueue(client, login_user, kind, params):
+    response = await client.post("/jobs", json={"kind": kind, "params": params}, headers=_headers(await login_user()))
+    assert response.status_code == 400
+
+async def test_valid_params_are_stored_with_defaults(client, login_user, monkeypatch):
+    monkeypatch.setattr(jobs.dispatcher, "notify", lambda: None)
+    response = await client.post("/jobs", json={"kind": "grade", "params": {"job_descriptions": ["python"]}}, headers=_headers(await login_user()))
+    assert response.status_code == 202
+
+    job = await Database(utils.jobs.JOBS_COLL).find_by_id(response.json()["id"])
+    assert job["params"] == {"job_descriptions": ["python"], "resumes": None, "top_k": 10}
+    await Database(utils.jobs.JOBS_COLL).delete_by_id(job["_id"])
+
+async def _enqueue(kind: str, params: dict) -> str:
+    now = jobs._now_utc()
+    return await Database(utils.jobs.JOBS_COLL).insert({
+        "kind": kind, "params": params, "owner": "test", "status": "queued", "attempts": 0, "run_after": now, "created_at": now, "updated_at": now
+    })
+
+async def test_one_ingestion_runs_at_a_time_across_dispatchers(mongo):
+    first, second = jobs.JobDispatcher(), jobs.JobDispatcher()
+    for dispatcher in (first, second):
+        dispatcher.jobs, dispatcher.locks = Database(utils.jobs.JOBS_COLL), Database(utils.jobs.JOB_LOCKS_COLL)
+    ingest_ids = [await _enqueue("ingest_directory", {}) for _ in range(2)]
+    grade_id = await _enqueue("grade", {"job_descriptions": ["python"]})
+
+    try:
+        claimed = await first._claim()
+        assert str(claimed["_id"]) == ingest_ids[0]
+        # Neither this dispatcher nor another one may start the second ingestion, other kinds still run
+        assert str((await first._claim())["_id"]) == grade_id
+        assert await first._claim() is None
+        assert await second._claim() is None
+
+        await first._release(first._locks.pop(claimed["_id"]))
+        assert str((await second._claim())["_id"]) == ingest_ids[1]
+    finally:
+        await Database(utils.jobs.JOBS_COLL).delete_many({"owner": "test"})
+        await Database(utils.jobs.JOB_LOCKS_COLL).delete_many({})
+
+async def test_expired_leases_are_reclaimed_until_max_attempts(mongo):
+    dispatcher = jobs.JobDispatcher()
+    dispatcher.jobs, dispatcher.locks = Database(utils.jobs.JOBS_COLL), Database(utils.jobs.JOB_LOCKS_COLL)
+    expired = jobs._now_utc() - timedelta(seconds=1)
+    job_ids = [await _enqueue("grade", {"job_descriptions": ["python"]}) for _ in range(2)]
+    for job_id, attempts in zip(job_ids, (jobs.JOB_MAX_ATTEMPTS - 1, jobs.JOB_MAX_ATTEMPTS)):
+        await dispatcher.jobs.update_by_id(job_id, {"status": "running", "lease_until": expired, "attempts": attempts})
+
+    try:
+        assert str((await dispatcher._claim())["_id"]) == job_ids[0]
+        assert await dispatcher._claim() is None
+    finally:
+        await Database(utils.jobs.JOBS_COLL).delete_many({"owner": "test"})
+
+def _p95(samples: list) -> float:
+    return statistics.quantiles(samples, n=20)[-1]
+
+async def _ping(client) -> float:
+    started = time.perf_counter()
+    assert (await client.get("/ping")).status_code == 200
+    return time.perf_counter() - started
+
+async def test_api_latency_stays_flat_during_ingestion(client, login_user, workdir, monkeypatch):
+    paragraph = "Senior python engineer, built fastapi services, data pipelines on spark and airflow. " * 12
+    for i in range(80): (workdir / "data" / f"resume_{i}.txt").write_text(f"resume {i}\n\n" + "\n\n".join([paragraph] * 20), encoding="utf-8")
+
+    executor = ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=init_job_worker, initargs=(str(workdir), chroma.CHROMA_PATH)
+    )
+    monkeypatch.setattr(jobs.dispatcher, "executor", executor)
+
+    try:
+        baseline = [await _ping(client) for _ in range(50)]
+
+        headers = _headers(await login_user())
+        job = (await client.post("/jobs", json={"kind": "ingest_directory", "params": {"incremental": False}}, headers=headers)).json()
+        during, status, deadline = [], "queued", time.monotonic() + 180
+        while status in ("queued", "running") and time.monotonic() < deadline:
+            if status == "running": during.extend([await _ping(client) for _ in range(10)])
+            else: await _ping(client)
+            job = (await client.get(f"/jobs/{job['id']}", headers=headers)).json()
+            status = job["status"]
+    finally:
+        executor.shutdown()
+
+    assert status == "succeeded", job["error"]
+    assert job["result"]["chunks_embedded"] > 500
+    assert len(during) >= 50
+    # A blocked event loop would show up as pings as slow as the whole ingestion
+    assert _p95(during) < max(5 * _p95(baseline), 0.05)
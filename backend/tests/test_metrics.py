@@ -0,0 +1,27 @@
+import pytest
+
+from api import metrics
+
+pytestmark = pytest.mark.anyio
+
+def _count(method: str, route: str, status: int) -> int:
+    return metrics.request_counts.get((method, route, status), 0)
+
+async def test_routes_are_labeled_with_their_full_template(client, login_user):
+    before = {key: _count(*key) for key in [("POST", "/auth/login", 200), ("GET", "/custom-docs/", 200), ("GET", "/", 200), ("GET", "/jobs/{job_id}", 404)]}
+
+    tokens = await login_user()
+    await client.get("/custom-docs/")
+    await client.get("/")
+    await client.get("/jobs/000000000000000000000000", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    assert {key: _count(*key) - count for key, count in before.items()} == dict.fromkeys(before, 1)
+    assert not any(route in ("/login", "/{job_id}") for _, route, _ in metrics.request_counts)
+
+async def test_unmatched_paths_share_one_label(client):
+    before = _count("GET", "unmatched", 404)
+    await client.get("/no-such-page")
+    await client.get("/another-missing-page")
+
+    assert _count("GET", "unmatched", 404) == before + 2
+    assert 'route="unmatched"' in metrics.render()
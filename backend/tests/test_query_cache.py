@@ -0,0 +1,33 @@
+from langchain.schema import Document
+
+from database.chroma import ChromaDB
+
+def _add(store: ChromaDB, doc_id: str, text: str):
+    store.add_documents([Document(page_content=text, metadata={"id": doc_id, "source": doc_id})])
+    store.flush()
+
+def test_repeated_queries_are_cached_until_a_write(workdir):
+    store = ChromaDB()
+    _add(store, "java", "java developer")
+    assert [doc.page_content for doc in store.query("python developer", top_k=1)] == ["java developer"]
+    assert len(store._query_cache) == 1
+
+    _add(store, "python", "python developer")
+    assert not store._query_cache
+    assert [doc.page_content for doc in store.query("python developer", top_k=1)] == ["python developer"]
+
+def test_results_of_a_search_that_raced_a_write_are_not_cached(workdir, monkeypatch):
+    store = ChromaDB()
+    _add(store, "java", "java developer")
+
+    collection = store.vectorstore._collection
+    search = collection.query
+    def search_then_write(*args, **kwargs):
+        found = search(*args, **kwargs)
+        _add(store, "python", "python developer")
+        return found
+    monkeypatch.setattr(collection, "query", search_then_write)
+    assert [doc.page_content for doc in store.query("python developer", top_k=1)] == ["java developer"]
+    monkeypatch.setattr(collection, "query", search)
+
+    assert [doc.page_content for doc in store.query("python developer", top_k=1)] == ["python developer"]
@@ -0,0 +1,44 @@
+import pytest
+
+from api import auth, ratelimit
+from api.ratelimit import LocalTokenBuckets
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def strict_limits(monkeypatch):
+    """The production username limit with fresh buckets, trusting X-Forwarded-For so tests can vary the client IP."""
+    monkeypatch.setattr(ratelimit, "buckets", LocalTokenBuckets())
+    monkeypatch.setattr(ratelimit, "AUTH_USER_RATE", 0.2)
+    monkeypatch.setattr(ratelimit, "AUTH_USER_BURST", 5)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_TRUST_FORWARDED", True)
+
+async def _login(client, username: str, password: str, ip: str) -> int:
+    response = await client.post("/auth/login", json={"username": username, "password": password}, headers={"X-Forwarded-For": ip})
+    return response.status_code
+
+async def test_spraying_a_username_from_other_ips_does_not_lock_out_its_owner(client, login_user, strict_limits):
+    username = auth.decode_token((await login_user())["access_token"])["usr"]
+
+    # Wrong passwords for the victim's username, a few from each of many addresses
+    attempts = [await _login(client, username, "wrong-password", f"10.0.0.{i}") for i in range(30) for _ in range(6)]
+    assert attempts.count(429) == 30 and attempts.count(401) == 150
+
+    assert await _login(client, username, "test-password", "192.0.2.1") == 200
+
+async def test_repeated_guesses_from_one_ip_are_limited(client, login_user, strict_limits):
+    username = auth.decode_token((await login_user())["access_token"])["usr"]
+
+    statuses = [await _login(client, username, "wrong-password", "10.1.0.1") for _ in range(8)]
+    assert statuses == [401] * 5 + [429] * 3
+
+async def test_evicting_refilled_buckets_is_not_forced():
+    buckets = LocalTokenBuckets(max_keys=2)
+    for key in ("a", "b", "c"): await buckets.take(key, rate=1e9, burst=1)
+    assert (buckets.evictions, buckets.forced_evictions) == (1, 0)
+
+async def test_evicting_draining_buckets_is_counted_as_forced():
+    buckets = LocalTokenBuckets(max_keys=2)
+    for key in ("a", "b", "c"): await buckets.take(key, rate=0.001, burst=1)
+    assert (buckets.evictions, buckets.forced_evictions) == (0, 1)
+    assert buckets.size() == 2
@@ -0,0 +1,47 @@
+from bson import ObjectId
+from datetime import datetime, timedelta
+import pytest
+
+import database
+from api import auth
+
+pytestmark = pytest.mark.anyio
+
+async def _login(client, username: str) -> dict:
+    response = await client.post("/auth/login", json={"username": username, "password": "test-password"})
+    assert response.status_code == 200
+    return response.json()
+
+async def _sessions(user_id: str) -> dict:
+    user = await database.get_db()[auth.USERS_COLL].find_one({"_id": ObjectId(user_id)}, {"refresh_sessions": 1})
+    return user.get("refresh_sessions", {})
+
+async def test_logins_keep_at_most_max_sessions(client, login_user):
+    claims = auth.decode_token((await login_user())["refresh_token"])
+    for _ in range(auth.REFRESH_MAX_SESSIONS + 3):
+        latest = await _login(client, claims["usr"])
+
+    sessions = await _sessions(claims["sub"])
+    assert len(sessions) == auth.REFRESH_MAX_SESSIONS
+    assert claims["fam"] not in sessions
+    assert auth.decode_token(latest["refresh_token"])["fam"] in sessions
+
+async def test_expired_sessions_are_dropped_on_login(client, login_user):
+    claims = auth.decode_token((await login_user())["refresh_token"])
+    await database.get_db()[auth.USERS_COLL].update_one(
+        {"_id": ObjectId(claims["sub"])},
+        {"$set": {f"refresh_sessions.{claims['fam']}.expires_at": datetime.utcnow() - timedelta(minutes=1)}},
+    )
+    await _login(client, claims["usr"])
+
+    sessions = await _sessions(claims["sub"])
+    assert claims["fam"] not in sessions and len(sessions) == 1
+
+async def test_refresh_rotates_and_rejects_replay(client, login_user):
+    tokens = await login_user()
+    rotated = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert rotated.status_code == 200
+
+    # Replaying the old token kills the family, so the rotated one stops working too
+    assert (await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})).status_code == 401
+    assert (await client.post("/auth/refresh", json={"refresh_token": rotated.json()["refresh_token"]})).status_code == 401
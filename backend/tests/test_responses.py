@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+import json
+import warnings
+import pytest
+
+from api import auth, trusted_json_response
+
+pytestmark = pytest.mark.anyio
+
+def test_trusted_responses_match_the_validated_schema():
+    doc = {"_id": "65a000000000000000000001", "username": "u", "name": "N", "email": "u@example.com", "phone_number": "1", "created_at": datetime.now(timezone.utc)}
+
+    response = trusted_json_response(auth._public_fields(doc), status_code=201)
+
+    assert (response.status_code, response.media_type) == (201, "application/json")
+    assert json.loads(response.body) == json.loads(auth.UserPublic(**auth._public_fields(doc)).model_dump_json())
+
+async def test_requests_do_not_emit_deprecation_warnings(client, login_user):
+    # FastAPI's own deprecation warnings do not subclass DeprecationWarning, so match them by category name
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        tokens = await login_user()
+        response = await client.put("/auth/update", json={"name": "Renamed"}, headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    assert response.status_code == 200 and response.json()["name"] == "Renamed"
+    assert not [str(warning.message) for warning in caught if "Deprecat" in warning.category.__name__]
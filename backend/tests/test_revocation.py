@@ -0,0 +1,95 @@
+from bson import ObjectId
+from fastapi import HTTPException, Request
+import asyncio
+import time
+import pytest
+
+import database
+from api import auth
+
+pytestmark = pytest.mark.anyio
+
+def _bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+async def test_logout_all_rejects_older_access_tokens_immediately(client, login_user):
+    headers = _bearer(await login_user())
+    assert (await client.post("/auth/logout-all", headers=headers)).status_code == 200
+
+    response = await client.post("/auth/logout-all", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+async def test_delete_rejects_older_access_tokens_immediately(client, login_user):
+    tokens = await login_user()
+    assert (await client.delete("/auth/delete", headers=_bearer(tokens))).status_code == 200
+
+    assert (await client.post("/auth/logout-all", headers=_bearer(tokens))).status_code == 401
+    assert (await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})).status_code == 401
+
+async def _wait_for(predicate, timeout: float) -> float:
+    start = time.perf_counter()
+    while not predicate() and time.perf_counter() - start < timeout:
+        await asyncio.sleep(0.005)
+    return time.perf_counter() - start
+
+async def test_polling_worker_sees_revocations_within_refresh_interval(client, login_user):
+    revoked, deleted = await login_user(), await login_user()
+    revoked_id = auth.decode_token(revoked["access_token"])["sub"]
+    deleted_id = auth.decode_token(deleted["access_token"])["sub"]
+
+    # A second worker's index; mongomock has no change streams, so it falls back to polling the revocations log
+    db = database.get_db()
+    interval = 0.2
+    other_worker = auth.RevocationIndex(refresh_interval=interval)
+    await other_worker.start(db[auth.USERS_COLL], db[auth.REVOCATIONS_COLL])
+    try:
+        assert other_worker.get(revoked_id) == 1 and other_worker.get(deleted_id) == 1
+
+        assert (await client.post("/auth/logout-all", headers=_bearer(revoked))).status_code == 200
+        assert (await client.delete("/auth/delete", headers=_bearer(deleted))).status_code == 200
+
+        elapsed = await _wait_for(lambda: other_worker.get(revoked_id) == 2 and other_worker.get(deleted_id) == float("inf"), timeout=interval * 5)
+        assert other_worker.get(revoked_id) == 2
+        assert other_worker.get(deleted_id) == float("inf")
+        assert elapsed <= interval * 1.5
+    finally:
+        await other_worker.stop()
+
+async def test_sync_errors_resync_instead_of_stopping(mongo):
+    db = database.get_db()
+    index = auth.RevocationIndex(refresh_interval=0.01, max_backoff=0.01)
+    await index.start(db[auth.USERS_COLL], db[auth.REVOCATIONS_COLL])
+    try:
+        # Break the next poll, then check the task reloads and keeps applying new revocations
+        polled_at, index._polled_at = index._polled_at, None
+        await asyncio.sleep(0.05)
+        assert not index._task.done()
+        assert index._polled_at is not None and index._polled_at >= polled_at
+
+        await auth.record_revocation(db, "000000000000000000000000", 7)
+        await _wait_for(lambda: index.get("000000000000000000000000") == 7, timeout=1)
+        assert index.get("000000000000000000000000") == 7
+    finally:
+        await index.stop()
+
+class RacingUsers:
+    """Users collection whose read races with a logout-all: the index is raised while the old document is read."""
+
+    def __init__(self, user_id: str, token_version: int):
+        self.user_id, self.token_version = user_id, token_version
+
+    async def find_one(self, *args, **kwargs):
+        auth.revocation_index._raise_to(self.user_id, self.token_version + 1)
+        return {"_id": ObjectId(self.user_id), "token_version": self.token_version}
+
+@pytest.mark.parametrize("dependency", [auth.get_current_principal, auth.get_current_user])
+async def test_reads_never_lower_the_indexed_version(login_user, dependency):
+    token = (await login_user())["access_token"]
+    claims = auth.decode_token(token)
+    auth.revocation_index._min_version.pop(claims["sub"])
+    request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+    with pytest.raises(HTTPException):
+        await dependency(request, {auth.USERS_COLL: RacingUsers(claims["sub"], claims["ver"])})
+    assert auth.revocation_index.get(claims["sub"]) == claims["ver"] + 1
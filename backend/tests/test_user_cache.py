@@ -0,0 +1,36 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+import pytest
+
+import database
+from api import auth
+from api.cache import user_cache
+
+pytestmark = pytest.mark.anyio
+
+def _bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+async def test_consecutive_updates_are_served_from_the_cache(client, login_user):
+    headers = _bearer(await login_user())
+    assert (await client.put("/auth/update", json={"name": "First"}, headers=headers)).status_code == 200
+
+    hits = user_cache.hits
+    response = await client.put("/auth/update", json={"name": "Second"}, headers=headers)
+    assert response.status_code == 200 and response.json()["name"] == "Second"
+    assert user_cache.hits == hits + 1
+
+async def test_cache_hit_rejects_tokens_revoked_on_another_worker(client, login_user):
+    headers = _bearer(await login_user())
+    user_id = auth.decode_token(headers["Authorization"].split()[1])["sub"]
+    assert (await client.put("/auth/update", json={"name": "Cached"}, headers=headers)).status_code == 200
+    assert user_cache.get(user_id) is not None
+
+    # Another worker's logout-all: the version is bumped and the index raised, but this worker's cache is untouched
+    user = await database.get_db()[auth.USERS_COLL].find_one_and_update(
+        {"_id": ObjectId(user_id)}, {"$inc": {"token_version": 1}}, return_document=ReturnDocument.AFTER
+    )
+    auth.revocation_index._raise_to(user_id, user["token_version"])
+
+    response = await client.put("/auth/update", json={"name": "Stale"}, headers=headers)
+    assert response.status_code == 401
@@ -1,18 +1,47 @@
-from langchain.document_loaders import DirectoryLoader
+from langchain.document_loaders import DirectoryLoader, UnstructuredFileLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from langchain_community.embeddings.bedrock import BedrockEmbeddings
-from typing import List, Optional
+from langchain.schema.embeddings import Embeddings
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
 from collections import defaultdict
+import multiprocessing
+import os
+import threading
+
+from utils.embedding_cache import CachedEmbeddings
+from utils.embedding_backends import EMBEDDING_BACKEND, get_embeddings
+from utils.metrics import register_gauges
 
 DATA_DIR = "data"
 
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
 def load_documents_from_directory(directory_path: str = DATA_DIR, file_types: List[str] = None) -> List[Document]:
     """Load documents from a specified directory using LangChain's DirectoryLoader."""
     loader = DirectoryLoader(directory_path, glob = file_types)
     documents = loader.load()
     return documents
 
+def list_directory_files(directory_path: str = DATA_DIR, file_types: Union[str, List[str]] = None) -> List[Path]:
+    """List the files `load_documents_from_directory` would load, using the same glob pattern(s)."""
+    patterns = [file_types] if isinstance(file_types, str) else (file_types or ["**/[!.]*"])
+    files = {path for pattern in patterns for path in Path(directory_path).glob(pattern) if path.is_file()}
+    return sorted(files)
+
+def load_documents_from_files(file_paths: List[str]) -> List[Document]:
+    """Load specific files with the same loader `DirectoryLoader` uses by default."""
+    documents = []
+    for file_path in file_paths:
+        documents.extend(UnstructuredFileLoader(file_path).load())
+    return documents
+
 def split_documents(documents: List[Document], chunk_size: int = 1000, chunk_overlap: int = 200) -> List[Document]:
     """Split documents into smaller chunks using RecursiveCharacterTextSplitter, adding unique string IDs."""
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
@@ -33,9 +62,88 @@ def split_documents(documents: List[Document], chunk_size: int = 1000, chunk_ove
         chunk.metadata["id"] = chunk_id
     return chunks
 
-# TODO: Swap over to ollame or hugging face embeddings in the future.
-def get_embedding_function(model_name: str = "amazon.titan-embed-text-v1") -> BedrockEmbeddings:
-    """Get the Bedrock embedding function."""
-    embeddings = BedrockEmbeddings(model_name=model_name, region_name="us-east-1")
-    return embeddings
+# -----------------------------------------------------------------------------
+# Streaming Ingestion Pipeline
+# -----------------------------------------------------------------------------
+def _load_and_split_file(file_path: str, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    # Runs in a worker process. Ids only depend on source/page, so splitting per file gives the same ids as split_documents on the whole corpus.
+    return split_documents(load_documents_from_files([file_path]), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+def iter_file_chunks(
+    file_paths: Iterable[Union[str, Path]],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    workers: int = INGEST_WORKERS,
+    max_pending: Optional[int] = None,
+) -> Iterator[Tuple[str, List[Document]]]:
+    """
+    Load and split files across a process pool, yielding (file path, chunks with `split_documents` ids) as
+    each file finishes.
+
+    At most `max_pending` files (default 2 * workers) are in flight, so a slow consumer throttles loading
+    instead of letting parsed files pile up in memory. Files are yielded in completion order.
+
+    Workers are spawned rather than forked, since callers usually have a Chroma client and helper threads
+    open by now, and a forked copy of their locks can hang the child.
+    """
+    max_pending = max_pending or workers * 2
+    files = iter([str(file_path) for file_path in file_paths])
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = {}
+        while True:
+            for file_path in islice(files, max_pending - len(pending)):
+                pending[executor.submit(_load_and_split_file, file_path, chunk_size, chunk_overlap)] = file_path
+            if not pending: return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+def iter_document_chunks(
+    directory_path: str = DATA_DIR,
+    file_types: Union[str, List[str]] = None,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    workers: int = INGEST_WORKERS,
+    max_pending: Optional[int] = None,
+) -> Iterator[Document]:
+    """Every chunk of the files in a directory, loaded and split by `iter_file_chunks`."""
+    files = list_directory_files(directory_path, file_types)
+    for _, chunks in iter_file_chunks(files, chunk_size, chunk_overlap, workers, max_pending):
+        yield from chunks
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """Group any iterable into lists of at most `batch_size` items."""
+    items = iter(items)
+    while batch := list(islice(items, batch_size)):
+        yield batch
+
+_embedding_caches: dict = {}
+_embedding_caches_lock = threading.Lock()
+
+def _reset_caches_after_fork():
+    # The SQLite connection behind each cache must not be shared with a forked child
+    global _embedding_caches_lock
+    _embedding_caches.clear()
+    _embedding_caches_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_caches_after_fork)
+
+def get_embedding_function(model_name: Optional[str] = None, backend: str = EMBEDDING_BACKEND, cache: bool = EMBEDDING_CACHE_ENABLED) -> Embeddings:
+    """
+    Get the embedding function for the configured backend (EMBEDDING_BACKEND / EMBEDDING_MODEL), behind the
+    persistent embedding cache unless `cache` is False. See utils.embedding_backends for the available backends.
+
+    Backends and caches are built once per process, so every ChromaDB shares one model, SQLite connection and LRU.
+    """
+    embeddings, model_name = get_embeddings(backend, model_name)
+    if not cache: return embeddings
 
+    with _embedding_caches_lock:
+        cached = _embedding_caches.get((backend, model_name))
+        if cached is None:
+            cached = CachedEmbeddings(embeddings, model_name=f"{backend}/{model_name}", path=EMBEDDING_CACHE_PATH, memory_size=EMBEDDING_CACHE_SIZE)
+            _embedding_caches[(backend, model_name)] = cached
+            register_gauges("embedding_cache", cached.stats)
+        return cached
@@ -0,0 +1,185 @@
+from langchain.schema.embeddings import Embeddings
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+import hashlib
+import math
+import os
+import queue
+import re
+import threading
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "bedrock")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", str(os.cpu_count() or 1)))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "1") == "1"
+
+# -----------------------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------------------
+# name -> (default model name, factory(model_name) -> Embeddings)
+EMBEDDING_BACKENDS: Dict[str, tuple] = {}
+
+def register_backend(name: str, default_model: str):
+    """Register an embedding backend factory under `name`, selectable with EMBEDDING_BACKEND."""
+    def decorator(factory: Callable[[str], Embeddings]):
+        EMBEDDING_BACKENDS[name] = (default_model, factory)
+        return factory
+    return decorator
+
+def resolve_model_name(backend: str = EMBEDDING_BACKEND, model_name: Optional[str] = None) -> str:
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {sorted(EMBEDDING_BACKENDS)}")
+    return model_name or EMBEDDING_MODEL or EMBEDDING_BACKENDS[backend][0]
+
+def create_embeddings(backend: str = EMBEDDING_BACKEND, model_name: Optional[str] = None) -> tuple:
+    """Build new embeddings for `backend`, returning (embeddings, resolved model name). Prefer `get_embeddings`."""
+    model_name = resolve_model_name(backend, model_name)
+    return EMBEDDING_BACKENDS[backend][1](model_name), model_name
+
+# One instance per (backend, model) and process: models, batcher threads and clients are costly to build
+_instances: Dict[tuple, Embeddings] = {}
+_instances_lock = threading.Lock()
+
+def _reset_after_fork():
+    # A forked child gets copies of the instances without their threads, and the lock in whatever state it was
+    global _instances_lock
+    _instances.clear()
+    _instances_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def get_embeddings(backend: str = EMBEDDING_BACKEND, model_name: Optional[str] = None) -> tuple:
+    """Process-wide shared embeddings for `backend`, returning (embeddings, resolved model name)."""
+    model_name = resolve_model_name(backend, model_name)
+    with _instances_lock:
+        if (backend, model_name) not in _instances:
+            _instances[(backend, model_name)] = create_embeddings(backend, model_name)[0]
+        return _instances[(backend, model_name)], model_name
+
+def warm_up(backend: str = EMBEDDING_BACKEND, model_name: Optional[str] = None):
+    """Build the shared embeddings and run one call, so the first real request does not pay for loading the model."""
+    embeddings, _ = get_embeddings(backend, model_name)
+    embeddings.embed_query("warm up")
+
+# -----------------------------------------------------------------------------
+# Dynamic Batching
+# -----------------------------------------------------------------------------
+class BatchingEmbeddings(Embeddings):
+    """
+    Coalesces concurrent embed calls from many threads into one batched call on the wrapped model.
+
+    A batch is sent once `max_batch_size` texts are queued or the oldest one has waited `max_wait_ms`.
+    Only meant for symmetric local models, where queries and documents are embedded the same way.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = EMBEDDING_BATCH_SIZE, max_wait_ms: float = EMBEDDING_MAX_WAIT_MS):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional["queue.Queue[tuple]"] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self) -> "queue.Queue[tuple]":
+        # Started on first use, and again in a forked child, which has a copy of the queue but not the thread
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    threading.Thread(target=self._worker, args=(self._queue,), name="embedding-batcher", daemon=True).start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts: return []
+        future: Future = Future()
+        self._ensure_worker().put((texts, future))
+        return future.result()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _worker(self, requests: "queue.Queue[tuple]"):
+        while True:
+            pending = [requests.get()]
+            size = len(pending[0][0])
+            try:
+                while size < self.max_batch_size:
+                    item = requests.get(timeout=self.max_wait)
+                    pending.append(item)
+                    size += len(item[0])
+            except queue.Empty:
+                pass
+
+            try:
+                vectors = self.embeddings.embed_documents([text for texts, _ in pending for text in texts])
+            except Exception as err:
+                for _, future in pending: future.set_exception(err)
+                continue
+
+            offset = 0
+            for texts, future in pending:
+                future.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
+
+# -----------------------------------------------------------------------------
+# Local Backends
+# -----------------------------------------------------------------------------
+class SentenceTransformerEmbeddings(Embeddings):
+    """Local CPU embeddings from a sentence-transformers model (optional dependency)."""
+
+    def __init__(self, model_name: str, batch_size: int = EMBEDDING_BATCH_SIZE, threads: int = EMBEDDING_THREADS):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic signed feature-hashing vectorizer over lowercase word tokens.
+
+    No model and no network, so it is meant for tests and offline benchmarks, not for real retrieval quality.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+# -----------------------------------------------------------------------------
+# Built-in Backends
+# -----------------------------------------------------------------------------
+@register_backend("bedrock", default_model="amazon.titan-embed-text-v1")
+def _bedrock(model_name: str) -> Embeddings:
+    from langchain_community.embeddings.bedrock import BedrockEmbeddings
+    return BedrockEmbeddings(model_name=model_name, region_name="us-east-1")
+
+@register_backend("sentence-transformers", default_model="sentence-transformers/all-MiniLM-L6-v2")
+def _sentence_transformers(model_name: str) -> Embeddings:
+    return BatchingEmbeddings(SentenceTransformerEmbeddings(model_name))
+
+@register_backend("hashing", default_model="hashing-384")
+def _hashing(model_name: str) -> Embeddings:
+    return HashingEmbeddings(dimensions=int(model_name.rsplit("-", 1)[-1]))
@@ -0,0 +1,111 @@
+from langchain.schema.embeddings import Embeddings
+from collections import OrderedDict
+from array import array
+from typing import Dict, List, Optional
+import hashlib
+import sqlite3
+import threading
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed cache in front of any LangChain `Embeddings`.
+
+    Vectors are keyed by (model name, query/document, sha256 of the text) and kept in two tiers: an in-memory
+    LRU and an SQLite file storing them as packed float32. Misses are embedded in a single batched call to the
+    wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, path: Optional[str] = None, memory_size: int = 10000):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = self.disk_hits = self.misses = 0
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+
+    # ------------------- Embeddings Interface -------------------
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "doc", self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    # ------------------- Cache Tiers -------------------
+
+    def _key(self, kind: str, text: str) -> str:
+        return f"{self.model_name}:{kind}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _embed(self, texts: List[str], kind: str, embed_fn) -> List[List[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        found: Dict[str, List[float]] = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            self.memory_hits += len(found)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and self._db is not None:
+            from_disk = self._read_disk(missing)
+            self.disk_hits += len(from_disk)
+            found.update(from_disk)
+            self._remember(from_disk)
+
+        to_embed = {key: text for key, text in zip(keys, texts) if key not in found}
+        if to_embed:
+            self.misses += len(to_embed)
+            vectors = embed_fn(list(to_embed.values()))
+            computed = {key: list(vector) for key, vector in zip(to_embed, vectors)}
+            found.update(computed)
+            self._remember(computed)
+            self._write_disk(computed)
+
+        return [found[key] for key in keys]
+
+    def _remember(self, vectors: Dict[str, List[float]]):
+        with self._lock:
+            for key, vector in vectors.items():
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch)
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _write_disk(self, vectors: Dict[str, List[float]]):
+        if self._db is None: return
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in vectors.items()],
+            )
+            self._db.commit()
+
+    # ------------------- Metrics -------------------
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_size": len(self._memory),
+        }
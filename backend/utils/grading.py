@@ -0,0 +1,100 @@
+from typing import Any, Dict, List, Optional
+import threading
+import numpy as np
+
+DEFAULT_SECTION = "body"
+
+class GradingEngine:
+    """
+    Scores many resumes against one or more job descriptions in a few matrix operations.
+
+    Stored chunk embeddings are pulled from the Chroma collection once into a contiguous, L2-normalised
+    float32 matrix, reloaded only when the store's persisted `generation()` or its chunk count changes, so
+    writes from ingestion jobs in other processes are picked up too. Cosine similarity for every
+    (chunk, job description) pair is a single matrix multiply. Each section scores as its best matching
+    chunk, a resume scores as the mean of its sections, and the best resumes are picked with `argpartition`.
+
+    Chunks are grouped by their `source` metadata, and by `section` metadata when present.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._snapshot: Optional[tuple] = None
+
+    def _load(self) -> tuple:
+        """
+        Return (state, matrix, resume_names, section_names, resume_codes, section_codes), reloading them if the
+        store changed since the last load. The codes give each matrix row's index into the two name arrays.
+        """
+        state = (self.store.generation(), self.store.vectorstore._collection.count())
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == state: return snapshot
+
+        with self._lock:
+            self.store.flush()
+            state = (self.store.generation(), self.store.vectorstore._collection.count())
+            if self._snapshot is not None and self._snapshot[0] == state: return self._snapshot
+            blocks, metadatas = [], []
+            for stored in self.store.iter_stored(["embeddings", "metadatas"]):
+                blocks.append(np.asarray(stored["embeddings"], dtype=np.float32).reshape(len(stored["ids"]), -1))
+                metadatas.extend(metadata or {} for metadata in stored["metadatas"])
+
+            matrix = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            resume_names, resume_codes = np.unique(np.array([str(metadata.get("source")) for metadata in metadatas]), return_inverse=True)
+            section_names, section_codes = np.unique(np.array([str(metadata.get("section", DEFAULT_SECTION)) for metadata in metadatas]), return_inverse=True)
+
+            # Swapped in as one tuple, so a concurrent grade() never mixes arrays from two loads
+            self._snapshot = (state, np.ascontiguousarray(matrix), resume_names, section_names, resume_codes, section_codes)
+            return self._snapshot
+
+    def grade(self, job_descriptions: List[str], resumes: Optional[List[str]] = None, top_k: int = 10) -> List[List[Dict[str, Any]]]:
+        """
+        Rank resumes (by source path, all stored resumes if `resumes` is None) against each job description.
+
+        Returns, per job description, up to `top_k` entries of {"resume", "score", "sections"}, best first.
+        """
+        _, matrix, resume_names, section_names, resume_codes, section_codes = self._load()
+        if resumes is not None:
+            mask = np.isin(resume_codes, np.flatnonzero(np.isin(resume_names, resumes)))
+            matrix, resume_codes, section_codes = matrix[mask], resume_codes[mask], section_codes[mask]
+        if not len(matrix): return [[] for _ in job_descriptions]
+
+        jobs = np.asarray(self.store.embedding_function.embed_documents(job_descriptions), dtype=np.float32)
+        jobs /= np.maximum(np.linalg.norm(jobs, axis=1, keepdims=True), 1e-12)
+        similarity = matrix @ jobs.T  # (chunks, jobs)
+
+        # Best chunk per (resume, section), then mean over each resume's sections. Grouping sorts the integer
+        # codes from _load; building and sorting string keys here cost ten times the scoring itself
+        section_keys, section_index = np.unique(resume_codes * len(section_names) + section_codes, return_inverse=True)
+        graded, section_resume = np.unique(section_keys // len(section_names), return_inverse=True)
+        section_scores = np.full((len(section_keys), len(job_descriptions)), -np.inf, dtype=np.float32)
+        np.maximum.at(section_scores, section_index, similarity)
+
+        section_counts = np.bincount(section_resume, minlength=len(graded)).astype(np.float32)
+        resume_scores = np.zeros((len(graded), len(job_descriptions)), dtype=np.float32)
+        np.add.at(resume_scores, section_resume, section_scores)
+        resume_scores /= section_counts[:, None]
+
+        # Keys sort by resume first, so each resume's sections are one contiguous range
+        bounds = np.searchsorted(section_resume, np.arange(len(graded) + 1))
+
+        k = min(top_k, len(graded))
+        results = []
+        for job in range(len(job_descriptions)):
+            scores = resume_scores[:, job]
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            results.append([
+                {
+                    "resume": str(resume_names[graded[i]]),
+                    "score": float(scores[i]),
+                    "sections": {
+                        str(section_names[section_keys[s] % len(section_names)]): float(section_scores[s, job])
+                        for s in range(bounds[i], bounds[i + 1])
+                    },
+                }
+                for i in top
+            ])
+        return results
@@ -0,0 +1,96 @@
+from pymongo import MongoClient
+from pydantic import BaseModel, Field
+from bson import ObjectId
+from datetime import datetime, timezone
+from pathlib import Path, PurePath
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+
+from database import DB_NAME, MONGO_URI
+from utils import DATA_DIR
+
+JOBS_COLL = "jobs"
+JOB_LOCKS_COLL = "job_locks"
+
+# Each worker process reports progress over its own small sync client
+_client: Optional[MongoClient] = None
+
+def _jobs_collection():
+    global _client
+    if _client is None: _client = MongoClient(MONGO_URI, maxPoolSize=1)
+    return _client[DB_NAME][JOBS_COLL]
+
+# -----------------------------------------------------------------------------
+# Job Parameters
+# -----------------------------------------------------------------------------
+class IngestDirectoryParams(BaseModel):
+    directory_path: str = DATA_DIR
+    file_types: Optional[Union[str, List[str]]] = None
+    incremental: bool = True
+
+class GradeParams(BaseModel):
+    job_descriptions: List[str] = Field(..., min_length=1)
+    resumes: Optional[List[str]] = None
+    top_k: int = Field(10, ge=1, le=1000)
+
+def _check_ingest_paths(params: IngestDirectoryParams):
+    # Only directories under DATA_DIR may be ingested, and glob patterns must not climb back out of them
+    data_dir = Path(DATA_DIR).resolve()
+    directory = Path(params.directory_path).resolve()
+    if directory != data_dir and data_dir not in directory.parents:
+        raise ValueError(f"directory_path must be inside {DATA_DIR}")
+
+    patterns = [params.file_types] if isinstance(params.file_types, str) else (params.file_types or [])
+    for pattern in patterns:
+        if PurePath(pattern).is_absolute() or ".." in PurePath(pattern).parts:
+            raise ValueError("file_types must be relative glob patterns without '..'")
+
+def validate_job_params(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Check `params` against the schema for `kind`, returning them with defaults filled in. Raises ValueError."""
+    parsed = JOB_PARAMS[kind](**params)
+    if isinstance(parsed, IngestDirectoryParams): _check_ingest_paths(parsed)
+    return parsed.model_dump()
+
+# -----------------------------------------------------------------------------
+# Job Handlers
+# -----------------------------------------------------------------------------
+def _ingest_directory(params: Dict[str, Any], progress: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    from database.chroma import ChromaDB
+
+    params = validate_job_params("ingest_directory", params)
+    return ChromaDB().load_and_add_documents_from_directory(
+        str(Path(params["directory_path"]).resolve()), params["file_types"], incremental=params["incremental"], on_progress=progress
+    )
+
+def _grade(params: Dict[str, Any], progress: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    from database.chroma import ChromaDB
+    from utils.grading import GradingEngine
+
+    params = validate_job_params("grade", params)
+    results = GradingEngine(ChromaDB()).grade(params["job_descriptions"], resumes=params["resumes"], top_k=params["top_k"])
+    return {"results": results}
+
+JOB_PARAMS: Dict[str, Type[BaseModel]] = {
+    "ingest_directory": IngestDirectoryParams,
+    "grade": GradeParams,
+}
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], Callable], Any]] = {
+    "ingest_directory": _ingest_directory,
+    "grade": _grade,
+}
+
+# Kinds that write to a store which only one process may write at a time. The dispatcher holds a lease on the
+# named lock in JOB_LOCKS_COLL while such a job runs, so at most one of them runs across all uvicorn workers.
+# Ingestion rewrites the BM25 index and manifest whole, and Chroma does not support several writer processes.
+JOB_LOCKS: Dict[str, str] = {
+    "ingest_directory": "chroma",
+}
+
+def run_job(job_id: str, kind: str, params: Dict[str, Any]) -> Any:
+    """Entry point inside a worker process: run the handler for `kind`, writing its progress onto the job document."""
+    collection = _jobs_collection()
+
+    def progress(state: Dict[str, Any]):
+        collection.update_one({"_id": ObjectId(job_id)}, {"$set": {"progress": state, "updated_at": datetime.now(timezone.utc)}})
+
+    return JOB_HANDLERS[kind](params, progress)
@@ -0,0 +1,73 @@
+from pymongo import monitoring
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+import functools
+import threading
+import time
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# -----------------------------------------------------------------------------
+# Primitives
+# -----------------------------------------------------------------------------
+class Histogram:
+    """Fixed-bucket histogram. Bucket counts are stored per bucket and made cumulative when rendered."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+lock = threading.Lock()
+operation_latency: Dict[Tuple[str, str], Histogram] = {}
+
+# name -> callable returning {metric suffix: value}, e.g. pool or cache stats owned by other modules
+gauge_collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+def register_gauges(prefix: str, collector: Callable[[], Dict[str, float]]):
+    """Expose every numeric value returned by `collector()` as a `<prefix>_<key>` gauge on /metrics."""
+    gauge_collectors[prefix] = collector
+
+def observe_operation(component: str, operation: str, seconds: float):
+    key = (component, operation)
+    with lock:
+        histogram = operation_latency.get(key)
+        if histogram is None: histogram = operation_latency[key] = Histogram()
+        histogram.observe(seconds)
+
+@contextmanager
+def timed(component: str, operation: str):
+    """Record the time spent in the block under operation_duration_seconds{component, operation}."""
+    start = time.perf_counter()
+    try: yield
+    finally: observe_operation(component, operation, time.perf_counter() - start)
+
+def timed_call(component: str, operation: str, fn: Callable) -> Callable:
+    """Wrap a sync callable so each call is recorded like `timed`."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with timed(component, operation): return fn(*args, **kwargs)
+    return wrapper
+
+# -----------------------------------------------------------------------------
+# Mongo Command Timing
+# -----------------------------------------------------------------------------
+class MongoCommandTimer(monitoring.CommandListener):
+    """Driver-level listener, so every command from auth and database.Database is timed without wrapping calls."""
+
+    def started(self, event): pass
+    def succeeded(self, event): observe_operation("mongo", event.command_name, event.duration_micros / 1e6)
+    def failed(self, event): observe_operation("mongo", event.command_name, event.duration_micros / 1e6)
+
+mongo_command_timer = MongoCommandTimer()